@@ -32,8 +32,11 @@ License : MIT
 _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
 """
 import os
-from comfy_api.latest  import ComfyExtension, io
-from .nodes.server     import *
+import time
+from comfy_api.latest        import ComfyExtension, io
+from .nodes.lib.profiling    import profile, STARTUP_PROFILER
+with profile("import", "nodes.server"):
+    from .nodes.server       import *
 __PROJECT_EMOJI = "⚡"                 #< emoji that identifies the project
 __PROJECT_MENU  = "Z-Image"            #< name of the menu where all the nodes will be
 __PROJECT_ID    = "//ZImagePowerNodes" #< used to identify the project in the ComfyUI node registry.
@@ -88,6 +91,11 @@ def _register_node(node_class, node_subcategory, node_list, deprecated: bool = F
     node_class.xDEPRECATED    = deprecated
     node_list.append( node_class )
 
+    # when profiling, the schema is generated here to measure it (ComfyUI will generate it again later)
+    if STARTUP_PROFILER.enabled:
+        with profile("define_schema", class_name):
+            node_class.define_schema()
+
 
 #======================= COMFY EXTENSION (V3 schema) =======================#
 
@@ -97,25 +105,41 @@ class ZImagePowerNodesExtension(ComfyExtension):
     async def get_node_list(self) -> list[type[io.ComfyNode]]:
         _PROJECT_MENU= "ZiNodes"
         nodes = []
+        start = time.perf_counter()
 
 
         #-- ROOT --------------------------------
         subcategory = ""
 
-        from .nodes.empty_zimage_latent_image import EmptyZImageLatentImage
-        _register_node( EmptyZImageLatentImage, subcategory, nodes )
+        with profile("import", "nodes.empty_zimage_latent_image"):
+            from .nodes.empty_zimage_latent_image import EmptyZImageLatentImage
+        with profile("register", "EmptyZImageLatentImage"):
+            _register_node( EmptyZImageLatentImage, subcategory, nodes )
+
+        with profile("import", "nodes.save_image"):
+            from .nodes.save_image import SaveImage
+        with profile("register", "SaveImage"):
+            _register_node( SaveImage, subcategory, nodes )
 
-        from .nodes.save_image import SaveImage
-        _register_node( SaveImage, subcategory, nodes )
+        with profile("import", "nodes.style_prompt_encoder"):
+            from .nodes.style_prompt_encoder import StylePromptEncoder
+        with profile("register", "StylePromptEncoder"):
+            _register_node( StylePromptEncoder, subcategory, nodes )
 
-        from .nodes.style_prompt_encoder import StylePromptEncoder
-        _register_node( StylePromptEncoder, subcategory, nodes )
+        with profile("import", "nodes.style_prompt_batch_encoder"):
+            from .nodes.style_prompt_batch_encoder import StylePromptBatchEncoder
+        with profile("register", "StylePromptBatchEncoder"):
+            _register_node( StylePromptBatchEncoder, subcategory, nodes )
 
-        from .nodes.style_string_injector import StyleStringInjector
-        _register_node( StyleStringInjector, subcategory, nodes )
+        with profile("import", "nodes.style_string_injector"):
+            from .nodes.style_string_injector import StyleStringInjector
+        with profile("register", "StyleStringInjector"):
+            _register_node( StyleStringInjector, subcategory, nodes )
 
-        from .nodes.zsampler_turbo import ZSamplerTurbo
-        _register_node( ZSamplerTurbo, subcategory, nodes )
+        with profile("import", "nodes.zsampler_turbo"):
+            from .nodes.zsampler_turbo import ZSamplerTurbo
+        with profile("register", "ZSamplerTurbo"):
+            _register_node( ZSamplerTurbo, subcategory, nodes )
 
 
         #--[ __deprecated ]----------------------
@@ -124,11 +148,15 @@ class ZImagePowerNodesExtension(ComfyExtension):
         # this is where nodes that were deprecated and
         # maintained only for compatibility go
 
-        from .nodes.deprecated_nodes.photo_style_prompt_encoder import PhotoStylePromptEncoder
-        _register_node( PhotoStylePromptEncoder, subcategory, nodes, deprecated=True )
+        with profile("import", "nodes.deprecated_nodes.photo_style_prompt_encoder"):
+            from .nodes.deprecated_nodes.photo_style_prompt_encoder import PhotoStylePromptEncoder
+        with profile("register", "PhotoStylePromptEncoder"):
+            _register_node( PhotoStylePromptEncoder, subcategory, nodes, deprecated=True )
 
-        from .nodes.deprecated_nodes.illustration_style_prompt_encoder import IllustrationStylePromptEncoder
-        _register_node( IllustrationStylePromptEncoder, subcategory, nodes, deprecated=True )
+        with profile("import", "nodes.deprecated_nodes.illustration_style_prompt_encoder"):
+            from .nodes.deprecated_nodes.illustration_style_prompt_encoder import IllustrationStylePromptEncoder
+        with profile("register", "IllustrationStylePromptEncoder"):
+            _register_node( IllustrationStylePromptEncoder, subcategory, nodes, deprecated=True )
 
 
         # report the number of nodes added by this extension
@@ -138,6 +166,8 @@ class ZImagePowerNodesExtension(ComfyExtension):
             logger.info(f"Imported {num_of_nodes} nodes + {num_of_deprecated} deprecated ones.")
         else:
             logger.info(f"Imported {num_of_nodes} nodes.")
+        logger.debug(f"Nodes imported and registered in {(time.perf_counter()-start)*1000:.1f} ms.")
+        STARTUP_PROFILER.report("Z-Image Power Nodes startup profile") #< only if ZIMAGE_NODES_PROFILE is set
         return nodes
 
 
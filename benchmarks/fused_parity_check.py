@@ -0,0 +1,190 @@
+"""
+File    : fused_parity_check.py
+Purpose : Checks that the fused sampler gives the same result as three separate ComfyUI sampler calls.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 18, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+For every sigma schedule of the ZSampler Turbo node, the three stages are
+denoised in two ways and the final latents are compared:
+
+  - three-call: three `comfy.samplers.KSAMPLER.sample()` calls with the Euler
+    method, each one wrapped as `CFGGuider.inner_sample()` does it
+    (`process_latent_in` when the latent is not empty, the sampler, then
+    `process_latent_out`), so the latent format round-trips between stages.
+  - fused: a single `FusedStagesSampler.sample()` call with the concatenated
+    sigmas, wrapped only once in the same way.
+
+The noise scaling, the latent format, KSAMPLER and the Euler method are the
+real ones of ComfyUI; only the denoiser is a cheap deterministic stand-in,
+since the stages do not depend on what the model predicts.
+
+It must be run with the Python environment of ComfyUI. Usage:
+
+    python benchmarks/fused_parity_check.py
+    python benchmarks/fused_parity_check.py --batch-size 4 --tolerance 1e-6
+
+The ComfyUI directory is found automatically when this repository is inside
+`ComfyUI/custom_nodes`, otherwise it can be given with `--comfyui`. The
+script exits with code 1 if any schedule differs more than `--tolerance`.
+
+"""
+import sys
+import argparse
+import importlib
+import importlib.util
+import importlib.machinery
+from pathlib import Path
+
+REPO_DIR    = Path(__file__).resolve().parent.parent
+NODES_DIR   = REPO_DIR / "nodes"
+PACKAGE     = "zimage_power_nodes_parity"  #< name of the synthetic package used to import the nodes
+SEED        = 1234
+FIXED_SEED  = 696969                       #< seed of the third stage, the same one used by the node
+
+
+#============================ STAND-IN MODEL ===============================#
+
+class StubModelWrap:
+    """
+    A deterministic replacement of the wrapped model that ComfyUI passes to the samplers.
+
+    It exposes the real model sampling (flow matching) and latent format (Flux)
+    that ComfyUI uses for Z-Image, only the denoiser prediction is made up.
+    """
+    def __init__(self, torch):
+        import comfy.model_sampling
+        import comfy.latent_formats
+
+        class ModelSampling(comfy.model_sampling.ModelSamplingDiscreteFlow, comfy.model_sampling.CONST):
+            pass
+
+        self.torch          = torch
+        self.model_sampling = ModelSampling(None)
+        self.latent_format  = comfy.latent_formats.Flux()
+        self.inner_model    = self
+
+    def __call__(self, x, sigma, model_options=None, seed=None, **kwargs):
+        sigma = sigma.reshape( sigma.shape[:1] + (1,) * (x.ndim - 1) )
+        return self.torch.tanh(x) * (1.0 - sigma) * 0.5
+
+    def process_latent_in(self, latent):
+        return self.latent_format.process_in(latent)
+
+    def process_latent_out(self, latent):
+        return self.latent_format.process_out(latent)
+
+
+def inner_sample(torch, model_wrap, sampler, sigmas, noise, latent_image):
+    """Does what `CFGGuider.inner_sample()` does around the sampler, except preparing the conditioning."""
+    if torch.count_nonzero(latent_image) > 0:
+        latent_image = model_wrap.process_latent_in(latent_image)
+    extra_args = {"model_options": {}, "seed": SEED}
+    samples    = sampler.sample(model_wrap, sigmas, extra_args, None, noise, latent_image, None, True)
+    return model_wrap.process_latent_out(samples.to(torch.float32))
+
+
+
+#============================= PARITY CHECK ================================#
+
+def load_modules(comfyui_dir: Path | None):
+    """
+    Imports the required modules of this repository as a synthetic package.
+
+    The repository cannot be imported as a regular package because its
+    `nodes` directory would collide with the `nodes` module of ComfyUI.
+    """
+    if comfyui_dir is None:
+        comfyui_dir = REPO_DIR.parent.parent
+    if not (comfyui_dir / "comfy").is_dir():
+        sys.exit(f"ComfyUI not found in '{comfyui_dir}', use --comfyui to indicate its directory.")
+    sys.path.insert(0, str(comfyui_dir))
+
+    spec    = importlib.machinery.ModuleSpec(PACKAGE, None, is_package=True)
+    package = importlib.util.module_from_spec(spec)
+    package.__path__ = [str(NODES_DIR)]
+    sys.modules[PACKAGE] = package
+
+    modules = {}
+    for name in ("lib.fused_sampler", "lib.sigma_schedules"):
+        modules[name] = importlib.import_module(f"{PACKAGE}.{name}")
+    return modules
+
+
+def check_schedule(modules, model_wrap, schedule, latent_image) -> float:
+    """Denoises `latent_image` with both paths and returns the maximum absolute difference."""
+    import torch
+    import comfy.sample
+    import comfy.samplers
+    import comfy.k_diffusion.sampling
+    FusedStage         = modules["lib.fused_sampler"].FusedStage
+    FusedStagesSampler = modules["lib.fused_sampler"].FusedStagesSampler
+    registry           = modules["lib.sigma_schedules"].get_sigma_schedules()
+
+    sigmas1, sigmas2, sigmas3 = registry.get_tensors(schedule)
+    noise1 = comfy.sample.prepare_noise(latent_image, SEED)
+    noise3 = comfy.sample.prepare_noise(latent_image, FIXED_SEED)
+
+    # three-call: the second stage does not add noise, as the node does with `add_noise=False`
+    sampler  = comfy.samplers.KSAMPLER(comfy.k_diffusion.sampling.sample_euler)
+    expected = inner_sample(torch, model_wrap, sampler, sigmas1, noise1                   , latent_image)
+    expected = inner_sample(torch, model_wrap, sampler, sigmas2, torch.zeros_like(noise1), expected)
+    expected = inner_sample(torch, model_wrap, sampler, sigmas3, noise3                   , expected)
+
+    # fused: a single call with the concatenated sigmas
+    stages  = [ FusedStage(steps=sigmas1.shape[-1] - 1, noise=None  , callback=None),
+                FusedStage(steps=sigmas2.shape[-1] - 1, noise=None  , callback=None),
+                FusedStage(steps=sigmas3.shape[-1] - 1, noise=noise3, callback=None) ]
+    sampler = FusedStagesSampler(stages)
+    fused   = inner_sample(torch, model_wrap, sampler, torch.cat([sigmas1, sigmas2, sigmas3]), noise1, latent_image)
+
+    return (expected - fused).abs().max().item()
+
+
+
+#================================== MAIN ===================================#
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks that the fused sampler matches three separate ComfyUI sampler calls.")
+    parser.add_argument("--comfyui"   , type=Path, default=None, help="Directory of ComfyUI (default: the one containing this repository)")
+    parser.add_argument("--batch-size", type=int  , default=2   , help="Batch size of the latents (default: 2)")
+    parser.add_argument("--size"      , type=int  , default=32  , help="Width and height of the latents (default: 32)")
+    parser.add_argument("--tolerance" , type=float, default=1e-5, help="Maximum absolute difference allowed (default: 1e-5)")
+    args = parser.parse_args()
+
+    # ComfyUI parses the command line when imported, so it must not see the arguments of this script
+    sys.argv = sys.argv[:1]
+    modules  = load_modules(args.comfyui)
+
+    import torch
+    torch.use_deterministic_algorithms(True)
+    model_wrap = StubModelWrap(torch)
+    registry   = modules["lib.sigma_schedules"].get_sigma_schedules()
+
+    # an empty latent (text to image) skips `process_latent_in` in the first stage, a non-empty one does not
+    shape   = (args.batch_size, 16, args.size, args.size)
+    latents = { "empty": torch.zeros(shape),
+                "image": torch.rand(shape, generator=torch.Generator().manual_seed(SEED)) }
+
+    failed = 0
+    for name in registry.get_names():
+        schedule = registry.get(name)
+        for kind, latent_image in latents.items():
+            max_diff = check_schedule(modules, model_wrap, schedule, latent_image)
+            ok       = max_diff <= args.tolerance
+            failed  += not ok
+            print(f"{name:<12} {kind:<6} max_abs_diff={max_diff:.3e}  {'ok' if ok else 'FAILED'}")
+
+    if failed:
+        print(f"Parity check FAILED: {failed} case(s) differ more than {args.tolerance}.")
+        sys.exit(1)
+    print("Parity check passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+File    : zsampler_turbo_benchmark.py
+Purpose : Deterministic CPU benchmark of the ZSampler Turbo node using a stand-in denoiser.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 17, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+Measures the overhead that the node adds around the model (noise generation,
+sigma tensors, progress callbacks, latent conversions, ...) without a GPU or
+the Z-Image checkpoint. The real ComfyUI samplers are used but the model is
+replaced by a cheap deterministic denoiser, and `comfy.sample.sample_custom`
+is replaced by a minimal equivalent that skips model loading and patching.
+
+It must be run with the Python environment of ComfyUI. Usage:
+
+    python benchmarks/zsampler_turbo_benchmark.py --output report.json
+    python benchmarks/zsampler_turbo_benchmark.py --steps 4,9 --batch-sizes 1,4 --ratios 1:1,16:9 --sizes small
+
+The ComfyUI directory is found automatically when this repository is inside
+`ComfyUI/custom_nodes`, otherwise it can be given with `--comfyui`. Every
+configuration is measured with the three separate sampler calls and with the
+fused sampler; `benchmarks/fused_parity_check.py` checks that both give the
+same result.
+
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import importlib
+import importlib.util
+import importlib.machinery
+from pathlib import Path
+
+REPO_DIR  = Path(__file__).resolve().parent.parent
+NODES_DIR = REPO_DIR / "nodes"
+PACKAGE   = "zimage_power_nodes_benchmark"  #< name of the synthetic package used to import the nodes
+SEED      = 1234
+
+
+#============================ STAND-IN MODEL ===============================#
+
+class StubModel:
+    """
+    A deterministic and cheap replacement of the Z-Image model.
+
+    It plays the role of the ModelPatcher received by the node and of the
+    wrapped model called by the samplers, recording the time spent denoising.
+    The noise scaling and the latent format are the real ones of ComfyUI for
+    Z-Image (flow matching with the Flux latent format).
+    """
+    def __init__(self, torch, metrics):
+        import comfy.model_sampling
+        import comfy.latent_formats
+
+        class ModelSampling(comfy.model_sampling.ModelSamplingDiscreteFlow, comfy.model_sampling.CONST):
+            pass
+
+        self.torch          = torch
+        self.metrics        = metrics
+        self.load_device    = torch.device("cpu")
+        self.model_sampling = ModelSampling(None)
+        self.latent_format  = comfy.latent_formats.Flux()
+        self.inner_model    = self
+        self.model          = self
+        self.model_options  = {}
+
+    def __call__(self, x, sigma, model_options=None, seed=None, **kwargs):
+        start = time.perf_counter()
+        sigma = sigma.reshape( sigma.shape[:1] + (1,) * (x.ndim - 1) )
+        x0    = self.torch.tanh(x) * (1.0 - sigma) * 0.5
+        self.metrics.observe("bench.denoiser_seconds", time.perf_counter() - start)
+        return x0
+
+
+def stub_sample_custom(model, noise, cfg, sampler, sigmas, positive, negative, latent_image,
+                       noise_mask=None, callback=None, disable_pbar=False, seed=None):
+    """Does what `comfy.sample.sample_custom()` does, except loading and patching the model."""
+    torch   = model.torch
+    start   = time.perf_counter()
+    device  = model.load_device
+    latent  = latent_image.to(device)
+    if torch.count_nonzero(latent) > 0:
+        latent = model.latent_format.process_in(latent)
+    noise   = noise.to(device)
+    sigmas  = sigmas.to(device)
+    model.metrics.observe("bench.latent_copy_seconds", time.perf_counter() - start)
+
+    extra_args = {"model_options": model.model_options, "seed": seed}
+    samples    = sampler.sample(model, sigmas, extra_args, callback, noise, latent, noise_mask, disable_pbar)
+
+    start   = time.perf_counter()
+    samples = model.latent_format.process_out(samples.to(torch.float32)).to("cpu")
+    model.metrics.observe("bench.latent_copy_seconds", time.perf_counter() - start)
+    return samples
+
+
+
+#=========================== BENCHMARK HARNESS =============================#
+
+def load_nodes(comfyui_dir: Path | None):
+    """
+    Imports the nodes of this repository as a synthetic package.
+
+    The repository cannot be imported as a regular package because its
+    `nodes` directory would collide with the `nodes` module of ComfyUI.
+    """
+    if comfyui_dir is None:
+        comfyui_dir = REPO_DIR.parent.parent
+    if not (comfyui_dir / "comfy").is_dir():
+        sys.exit(f"ComfyUI not found in '{comfyui_dir}', use --comfyui to indicate its directory.")
+    sys.path.insert(0, str(comfyui_dir))
+
+    spec    = importlib.machinery.ModuleSpec(PACKAGE, None, is_package=True)
+    package = importlib.util.module_from_spec(spec)
+    package.__path__ = [str(NODES_DIR)]
+    sys.modules[PACKAGE] = package
+
+    modules = {}
+    for name in ("zsampler_turbo", "empty_zimage_latent_image", "lib.metrics", "lib.progress_bar", "lib.sigma_schedules"):
+        modules[name] = importlib.import_module(f"{PACKAGE}.{name}")
+    return modules
+
+
+def install_instrumentation(modules, metrics):
+    """Replaces the parts of ComfyUI that need a real model and times the node internals."""
+    import comfy.sample
+    import latent_preview
+    ZSamplerTurbo   = modules["zsampler_turbo"].ZSamplerTurbo
+    ProgressPreview = modules["lib.progress_bar"].ProgressPreview
+    registry        = modules["lib.sigma_schedules"].get_sigma_schedules()
+
+    def timed(name, function):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - start)
+        return wrapper
+
+    comfy.sample.sample_custom              = stub_sample_custom
+    comfy.sample.fix_empty_latent_channels  = timed("bench.latent_copy_seconds", lambda model, latent, *args, **kwargs: latent)
+    latent_preview.get_previewer            = lambda device, latent_format, *args, **kwargs: None
+    ProgressPreview.__call__                = timed("bench.callback_seconds", ProgressPreview.__call__)
+    ZSamplerTurbo.repeat_latent_batch       = staticmethod(timed("bench.latent_copy_seconds", ZSamplerTurbo.repeat_latent_batch))
+    registry.get_tensors                    = timed("bench.sigma_seconds", registry.get_tensors)
+
+
+def run_config(modules, model, metrics, *, steps, batch_size, ratio, size, fused, repeats, warmup):
+    """Runs the node several times with one configuration and returns its statistics."""
+    ZSamplerTurbo          = modules["zsampler_turbo"].ZSamplerTurbo
+    EmptyZImageLatentImage = modules["empty_zimage_latent_image"].EmptyZImageLatentImage
+    os.environ["ZIMAGE_NODES_FUSED_SAMPLER"] = "1" if fused else ""
+
+    latent = EmptyZImageLatentImage.execute(landscape=True, ratio=ratio, size=size, batch_size=batch_size).result[0]
+    for iteration in range(warmup + repeats):
+        if iteration == warmup:
+            metrics.reset()
+        ZSamplerTurbo.execute(model, positive=[], latent_input=latent, seed=SEED, steps=steps, denoise=1.0).result[0]
+
+    def mean(name, **labels):
+        metric = metrics.get(name, **labels)
+        return metric.total / repeats if metric else 0.0
+
+    total    = mean("zsampler.total_seconds", steps=steps)
+    denoiser = mean("bench.denoiser_seconds")
+    result   = {
+        "steps"              : steps,
+        "batch_size"         : batch_size,
+        "ratio"              : ratio.split()[0],
+        "size"               : size.split()[0],
+        "latent_shape"       : list(latent["samples"].shape),
+        "mode"               : "fused" if fused else "three_call",
+        "total_seconds"      : total,
+        "overhead_seconds"   : total - denoiser,
+        "stage_seconds"      : [ mean("zsampler.stage_seconds", stage=stage, steps=steps) for stage in (1, 2, 3) ],
+        "fused_seconds"      : mean("zsampler.fused_seconds", steps=steps),
+        "denoiser_seconds"   : denoiser,
+        "noise_seconds"      : mean("zsampler.noise_seconds", add_noise=True) + mean("zsampler.noise_seconds", add_noise=False),
+        "sigma_seconds"      : mean("bench.sigma_seconds"),
+        "callback_seconds"   : mean("bench.callback_seconds"),
+        "latent_copy_seconds": mean("bench.latent_copy_seconds"),
+    }
+    return result
+
+
+def parse_list(text: str, choices: list[str] | None = None) -> list:
+    """Parses a comma-separated list; with `choices`, each item selects the choice that starts with it."""
+    items = [ item.strip() for item in text.split(",") if item.strip() ]
+    if choices is None:
+        return [ int(item) for item in items ]
+    selected = []
+    for item in items:
+        matches = [ choice for choice in choices if choice.startswith(item) ]
+        if not matches:
+            sys.exit(f"Unknown value '{item}', valid values: {', '.join(choice.split()[0] for choice in choices)}")
+        selected.append(matches[0])
+    return selected
+
+
+def get_project_version() -> str | None:
+    try:
+        import tomllib
+        with open(REPO_DIR / "pyproject.toml", "rb") as file:
+            return tomllib.load(file)["project"]["version"]
+    except (ImportError, OSError, KeyError, ValueError):
+        return None
+
+
+
+#================================== MAIN ===================================#
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic CPU benchmark of the ZSampler Turbo node.")
+    parser.add_argument("--comfyui"    , type=Path, default=None, help="Directory of ComfyUI (default: the one containing this repository)")
+    parser.add_argument("--output"     , type=Path, default=Path("zsampler_turbo_benchmark.json"), help="File where the JSON report is written")
+    parser.add_argument("--steps"      , default="4,7,9"         , help="Comma-separated list of steps (default: 4,7,9)")
+    parser.add_argument("--batch-sizes", default="1,4"           , help="Comma-separated list of batch sizes (default: 1,4)")
+    parser.add_argument("--ratios"     , default="1:1,3:2,16:9"  , help="Aspect ratios of EmptyZImageLatentImage (default: 1:1,3:2,16:9)")
+    parser.add_argument("--sizes"      , default="small,medium"  , help="Sizes of EmptyZImageLatentImage (default: small,medium)")
+    parser.add_argument("--repeats"    , type=int  , default=5   , help="Measured runs of each configuration (default: 5)")
+    parser.add_argument("--warmup"     , type=int  , default=1   , help="Unmeasured runs before each configuration (default: 1)")
+    parser.add_argument("--threads"    , type=int  , default=None, help="Number of CPU threads used by torch")
+    args = parser.parse_args()
+
+    # ComfyUI parses the command line when imported, so it must not see the arguments of this script
+    sys.argv = sys.argv[:1]
+    modules  = load_nodes(args.comfyui)
+    empty    = modules["empty_zimage_latent_image"]
+
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.use_deterministic_algorithms(True)
+
+    metrics = modules["lib.metrics"].METRICS
+    model   = StubModel(torch, metrics)
+    install_instrumentation(modules, metrics)
+
+    steps_list  = parse_list(args.steps)
+    batch_sizes = parse_list(args.batch_sizes)
+    ratios      = parse_list(args.ratios, list(empty.LANDSCAPE_SIZES_BY_ASPECT_RATIO))
+    sizes       = parse_list(args.sizes , list(empty.SCALES_BY_NAME))
+
+    results = []
+    for steps in steps_list:
+        for batch_size in batch_sizes:
+            for ratio in ratios:
+                for size in sizes:
+                    for fused in (False, True):
+                        result = run_config(modules, model, metrics,
+                                            steps=steps, batch_size=batch_size, ratio=ratio, size=size,
+                                            fused=fused, repeats=args.repeats, warmup=args.warmup)
+                        results.append(result)
+                        print(f"steps={steps} batch={batch_size} {result['ratio']:>5} {result['size']:<6} {result['mode']:<10} "
+                              f"total={result['total_seconds']*1000:8.2f} ms  overhead={result['overhead_seconds']*1000:8.2f} ms")
+
+    report = {
+        "benchmark"  : "zsampler_turbo",
+        "version"    : get_project_version(),
+        "created"    : time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": { "python": platform.python_version(), "torch": torch.__version__,
+                         "platform": platform.platform(), "threads": torch.get_num_threads() },
+        "settings"   : { "repeats": args.repeats, "warmup": args.warmup, "seed": SEED },
+        "results"    : results,
+    }
+    args.output.write_text( json.dumps(report, indent=2) )
+    print(f"Report written to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
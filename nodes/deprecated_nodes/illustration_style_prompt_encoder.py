@@ -18,8 +18,7 @@ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
 from comfy_api.latest                 import io
 from ..lib.system                     import logger
 from ..lib.style_group                import StyleGroup
-from ..styles.predefined_styles_v080  import PREDEFINED_STYLE_GROUPS
-ILLUSTRATION_STYLES = next((style_group for style_group in PREDEFINED_STYLE_GROUPS if style_group.category == "illustration"))
+from ..styles.predefined_styles       import STYLE_VERSIONS
 
 
 class IllustrationStylePromptEncoder(io.ComfyNode):
@@ -27,6 +26,7 @@ class IllustrationStylePromptEncoder(io.ComfyNode):
     xCATEGORY      = ""
     xCOMFY_NODE_ID = ""
     xDEPRECATED    = False
+    xSTYLES        = "v0.8.0"  #< version of the predefined styles used by this node
 
     #__ INPUT / OUTPUT ____________________________________
     @classmethod
@@ -71,14 +71,14 @@ class IllustrationStylePromptEncoder(io.ComfyNode):
     def execute(cls, clip, style_to_apply: str, text: str, customization: str = "") -> io.NodeOutput:
         prompt        = text
         style_name    = style_to_apply if isinstance(style_to_apply, str) else "none"
-        custom_styles = StyleGroup.from_string(customization)
+        custom_styles = StyleGroup.from_string_cached(customization)
 
         # try to find the definition of the style selected by the user,
         # first search inside the custom styles that the user has defined (if any),
         # if not found, then try to find it in the predefined styles
         style = custom_styles.get_style_template(style_name) if style_name != "none" else None
         if not style:
-            style = ILLUSTRATION_STYLES.get_style_template(style_name)
+            style = STYLE_VERSIONS.get_style_template(style_name, cls.xSTYLES, "illustration")
 
         # if the style was found, apply it to the prompt
         if style:
@@ -91,5 +91,6 @@ class IllustrationStylePromptEncoder(io.ComfyNode):
 
     @classmethod
     def style_names(cls) -> list[str]:
-        return ["none"] + ILLUSTRATION_STYLES.get_names()
+        # the names are listed without parsing the styles, they are parsed when the node is executed
+        return ["none"] + STYLE_VERSIONS.get_names(cls.xSTYLES, "illustration")
 
@@ -0,0 +1,194 @@
+"""
+File    : conditioning_cache.py
+Purpose : LRU cache of the conditionings generated by the text encoder.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 6, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+A conditioning in ComfyUI is a list of [tensor, dict] pairs, where the dict
+can contain more tensors (e.g. "pooled_output"). Cached conditionings are
+treated as read-only: on each hit a new list/dict structure is returned but
+the tensors are shared.
+
+"""
+import os
+import weakref
+import threading
+import torch
+from collections import OrderedDict
+from typing      import Any, Callable
+from .system     import logger
+
+
+class ConditioningCache:
+    """
+    An LRU cache of conditionings keyed by (text encoder identity, prompt).
+
+    The text encoder is identified by its model object, the uuid of the
+    patches applied to it (LoRAs, etc), its last layer and tokenizer options,
+    so a patched clone of the same encoder never shares entries with the
+    original one.
+
+    Args:
+        max_bytes      (int): Memory budget for all cached tensors. 0 disables the cache.
+        offload_device (str): Device where the cached tensors are stored. Defaults to "cpu".
+    """
+    def __init__(self,
+                 max_bytes     : int,
+                 offload_device: str = "cpu",
+                 ):
+        self.max_bytes      = max(0, int(max_bytes))
+        self.offload_device = offload_device
+        self.hits           = 0
+        self.misses         = 0
+        self._entries       = OrderedDict()  #< key -> (model_ref, conditioning, size)
+        self._total_bytes   = 0
+        self._lock          = threading.Lock()
+
+
+    def get(self, clip: Any, prompt: str) -> list | None:
+        """
+        Returns the cached conditioning for `prompt` encoded with `clip`, or None if it's not cached.
+        """
+        key = self._get_key(clip, prompt)
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            # the model is compared to make sure the id was not reused by a new model
+            if entry is not None and entry[0]() is not clip.cond_stage_model:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return _map_conditioning(entry[1], lambda tensor: tensor)
+
+
+    def put(self, clip: Any, prompt: str, conditioning: list) -> list:
+        """
+        Stores a copy of the conditioning (on the offload device) and returns the original one.
+        """
+        key = self._get_key(clip, prompt)
+        if key is None:
+            return conditioning
+
+        stored = _map_conditioning(conditioning, lambda tensor: tensor.detach().to(self.offload_device))
+        size   = _get_conditioning_size(stored)
+        if size > self.max_bytes:
+            return conditioning
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (weakref.ref(clip.cond_stage_model), stored, size)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes:
+                self._remove( next(iter(self._entries)) )
+        return conditioning
+
+
+    def clear(self):
+        """Removes all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+
+    @property
+    def total_bytes(self) -> int:
+        """The memory used by all cached tensors."""
+        return self._total_bytes
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def __str__(self) -> str:
+        return f"ConditioningCache({len(self)} entries, {self._total_bytes/2**20:.1f} MiB, {self.hits} hits, {self.misses} misses)"
+
+
+    #__ internal functions ________________________________
+
+    def _get_key(self, clip: Any, prompt: str) -> tuple | None:
+        """Returns the key for a (clip, prompt) pair, or None if the result must not be cached."""
+        if self.max_bytes <= 0:
+            return None
+        model = getattr(clip, "cond_stage_model", None)
+        if model is None:
+            return None
+        # scheduled hooks make the output depend on more than the prompt
+        if getattr(clip, "use_clip_schedule", False) or getattr(clip, "apply_hooks_to_conds", None):
+            return None
+        patcher          = getattr(clip, "patcher", None)
+        patches_uuid     = getattr(patcher, "patches_uuid", None)
+        layer_idx        = getattr(clip, "layer_idx", None)
+        tokenizer_option = repr(sorted( getattr(clip, "tokenizer_options", {}).items() ))
+        return (id(model), patches_uuid, layer_idx, tokenizer_option, prompt)
+
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[2]
+
+
+
+#========================== PROCESS-WIDE INSTANCE ==========================#
+
+def _get_env_megabytes(name: str, *, default: int) -> int:
+    """Returns the value of an environment variable expressed in megabytes as bytes."""
+    try   : return max(0, int(os.getenv(name, ""))) * 2**20
+    except: return default * 2**20
+
+# the memory budget can be configured with `ZIMAGE_NODES_COND_CACHE_MB` (0 disables the cache)
+CONDITIONING_CACHE = ConditioningCache( _get_env_megabytes("ZIMAGE_NODES_COND_CACHE_MB", default=256) )
+
+
+def encode_prompt(clip: Any, prompt: str) -> list:
+    """
+    Encodes a prompt with the given text encoder, reusing the cached conditioning when possible.
+
+    Args:
+        clip   : The ComfyUI CLIP object used for encoding the text.
+        prompt : The text to encode.
+    Returns:
+        The conditioning generated by `clip.encode_from_tokens_scheduled()`.
+    """
+    conditioning = CONDITIONING_CACHE.get(clip, prompt)
+    if conditioning is None:
+        tokens       = clip.tokenize(prompt)
+        conditioning = CONDITIONING_CACHE.put(clip, prompt, clip.encode_from_tokens_scheduled(tokens))
+    logger.debug(str(CONDITIONING_CACHE))
+    return conditioning
+
+
+
+#============================ HELPER FUNCTIONS =============================#
+
+def _map_conditioning(conditioning: list, function: Callable[[torch.Tensor], torch.Tensor]) -> list:
+    """Returns a new conditioning structure applying `function` to each tensor."""
+    def map_value(value):
+        if isinstance(value, torch.Tensor): return function(value)
+        if isinstance(value, dict)        : return { k: map_value(v) for k, v in value.items() }
+        if isinstance(value, list)        : return [ map_value(v) for v in value ]
+        if isinstance(value, tuple)       : return tuple( map_value(v) for v in value )
+        return value
+    return map_value(conditioning)
+
+
+def _get_conditioning_size(conditioning: list) -> int:
+    """Returns the number of bytes used by all tensors in a conditioning."""
+    def get_size(value) -> int:
+        if isinstance(value, torch.Tensor)  : return value.numel() * value.element_size()
+        if isinstance(value, dict)          : return sum( get_size(v) for v in value.values() )
+        if isinstance(value, (list, tuple)) : return sum( get_size(v) for v in value )
+        return 0
+    return get_size(conditioning)
@@ -0,0 +1,117 @@
+"""
+File    : fused_sampler.py
+Purpose : A ComfyUI sampler that runs several denoising stages in a single sampling call.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 16, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+Each call to `comfy.sample.sample_custom()` patches and loads the model,
+prepares the conditioning and sets up the callbacks. When a generation is
+split in several stages with their own sigmas and noise, the fused sampler
+lets that setup happen only once: the sigmas of all stages are concatenated
+and passed in a single call, and the sampler splits them again, reproducing
+at every stage boundary what ComfyUI does between two separate calls:
+
+    latent = inverse_noise_scaling( last_sigma_of_stage, x )
+    x      = noise_scaling( first_sigma_of_next_stage, noise_of_next_stage, latent )
+
+"""
+import os
+import torch
+import comfy.samplers
+import comfy.k_diffusion.sampling
+from typing import Callable, NamedTuple
+
+
+class FusedStage(NamedTuple):
+    steps   : int                    #< number of denoising steps (the stage has steps+1 sigmas)
+    noise   : torch.Tensor | None    #< noise added at the start of the stage, None = no noise
+                                     #  (ignored in the first stage, which uses the noise given to the sampler)
+    callback: Callable | None        #< called after each step as `callback(step, x0, x, total_steps)`
+    on_start: Callable | None = None #< called without arguments just before the first step of the stage
+
+
+class FusedStagesSampler(comfy.samplers.Sampler):
+    """
+    A sampler that denoises several consecutive stages in a single sampling call.
+
+    It must receive the concatenation of the sigmas of all stages, the noise
+    given to ComfyUI is used for the first stage and the noise of the other
+    stages is taken from their `FusedStage` definition.
+
+    Args:
+        stages     (list[FusedStage]): The stages to run, in order.
+        sampler_function (optional): The k-diffusion sampling function used in every stage.
+                                     Defaults to the Euler method.
+    """
+    def __init__(self,
+                 stages          : list[FusedStage],
+                 sampler_function: Callable | None = None,
+                 ):
+        self.stages           = stages
+        self.sampler_function = sampler_function or comfy.k_diffusion.sampling.sample_euler
+
+
+    def sample(self, model_wrap, sigmas, extra_args, callback, noise, latent_image=None, denoise_mask=None, disable_pbar=False):
+        expected_sigmas = sum(stage.steps + 1 for stage in self.stages)
+        if sigmas.shape[-1] != expected_sigmas:
+            raise ValueError(f"The fused sampler expected {expected_sigmas} sigmas but received {sigmas.shape[-1]}.")
+        if latent_image is None:
+            latent_image = torch.zeros_like(noise)
+
+        extra_args["denoise_mask"] = denoise_mask
+        model_k                    = comfy.samplers.KSamplerX0Inpaint(model_wrap, sigmas)
+        model_k.latent_image       = latent_image
+        model_k.noise              = noise
+        model_sampling             = model_wrap.inner_model.model_sampling
+
+        latent = latent_image
+        start  = 0
+        for number, stage in enumerate(self.stages):
+            stage_sigmas = sigmas[start : start + stage.steps + 1]
+            start       += stage.steps + 1
+
+            # the first stage uses the noise prepared by ComfyUI,
+            # the following ones start from the latent denoised so far
+            if number == 0:
+                stage_noise = noise
+            elif stage.noise is not None:
+                stage_noise = stage.noise.to(device=latent.device, dtype=latent.dtype)
+            else:
+                stage_noise = torch.zeros((), device=latent.device, dtype=latent.dtype).expand(latent.shape)
+
+            if stage.on_start:
+                stage.on_start()
+            max_denoise = self.max_denoise(model_wrap, stage_sigmas)
+            x           = model_sampling.noise_scaling(stage_sigmas[0], stage_noise, latent, max_denoise)
+            x           = self.sampler_function(model_k, x, stage_sigmas,
+                                                extra_args = extra_args,
+                                                callback   = self._get_k_callback(stage),
+                                                disable    = disable_pbar)
+            latent      = model_sampling.inverse_noise_scaling(stage_sigmas[-1], x)
+
+        return latent
+
+
+    #__ internal functions ________________________________
+
+    @staticmethod
+    def _get_k_callback(stage: FusedStage) -> Callable | None:
+        """Returns a k-diffusion callback that forwards the steps of a stage to its callback."""
+        if stage.callback is None:
+            return None
+        callback, total_steps = stage.callback, stage.steps
+        return lambda x: callback(x["i"], x["denoised"], x["x"], total_steps)
+
+
+
+#============================ HELPER FUNCTIONS =============================#
+
+def is_fused_sampler_enabled() -> bool:
+    """Returns True if the fused sampler was enabled with the `ZIMAGE_NODES_FUSED_SAMPLER` environment variable."""
+    return os.getenv("ZIMAGE_NODES_FUSED_SAMPLER", "").strip().lower() in ("1", "true", "yes", "on")
@@ -172,3 +172,32 @@ def normalize_images(images: torch.Tensor,
 
     return images
 
+
+
+
+def quantize_images(images: torch.Tensor,
+                    /,*,
+                    on_source_device: bool = True,
+                    ) -> torch.Tensor:
+    """
+    Converts a whole batch of images to 8-bit pixels in a single pass.
+
+    The float values [0.0 -> 1.0] are scaled to [0 -> 255], clamped and
+    truncated to uint8 exactly as `np.clip(x*255,0,255).astype(np.uint8)` does,
+    but only one temporary float tensor is allocated for the entire batch.
+
+    Args:
+        images           (Tensor): A batch of images with shape [batch_size, height, width, channels].
+        on_source_device (optional): If True, the quantization is done on the device where
+                                     `images` are stored, so only the uint8 pixels are
+                                     transferred to the CPU. Defaults to True.
+    Returns:
+        A contiguous uint8 tensor on CPU with the same shape as `images`.
+    """
+    with torch.no_grad():
+        if not on_source_device:
+            images = images.to("cpu")
+        pixels = images.mul(255.0)  #< the only float allocation (source is never modified)
+        pixels.clamp_(0.0, 255.0)
+        pixels = pixels.to(torch.uint8)
+        return pixels.to("cpu").contiguous()
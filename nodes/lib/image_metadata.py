@@ -0,0 +1,225 @@
+"""
+File    : image_metadata.py
+Purpose : Serialized image metadata with cached encodings, ready to embed in saved images.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 3, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import json
+import hashlib
+import threading
+from collections         import OrderedDict
+from typing              import Any
+from PIL                 import Image
+from PIL.PngImagePlugin  import PngInfo
+
+# the EXIF block of a JPEG file is stored in a single APP1 marker,
+# Pillow refuses to write blocks bigger than this
+JPEG_MAX_EXIF_SIZE = 65533
+
+
+class ImageMetadata:
+    """
+    The metadata texts (already serialized to JSON) to embed into saved images.
+
+    Each encoding of the metadata (for example the PNG chunks) is generated
+    only the first time it is requested, later requests reuse the same object.
+    Encoded objects are shared between threads and must not be modified.
+
+    Args:
+        texts (dict): An ordered dictionary mapping each metadata key to its text.
+    """
+    def __init__(self, texts: dict[str, str]):
+        self.texts     = dict(texts)
+        self._digest   = None
+        self._pnginfos = {}
+        self._exifs    = {}   #< keys -> EXIF bytes
+        self._lock     = threading.Lock()
+
+
+    @classmethod
+    def from_objects(cls, objects: dict[str, Any]) -> "ImageMetadata":
+        """Creates an `ImageMetadata` instance serializing each object to JSON."""
+        return cls( { key: json.dumps(obj) for key, obj in objects.items() } )
+
+
+    @property
+    def digest(self) -> str:
+        """A hash that identifies the content of the metadata."""
+        if self._digest is None:
+            hasher = hashlib.sha1()
+            for key, text in self.texts.items():
+                hasher.update( key .encode("utf-8", "surrogatepass") + b"\0" )
+                hasher.update( text.encode("utf-8", "surrogatepass") + b"\0" )
+            self._digest = hasher.hexdigest()
+        return self._digest
+
+
+    def get_pnginfo(self, *, compress: bool = False) -> PngInfo:
+        """
+        Returns the metadata encoded as PNG text chunks.
+
+        Args:
+            compress (optional): If True, the texts are stored zlib-compressed
+                                 (zTXt/iTXt chunks) instead of plain tEXt chunks.
+        """
+        with self._lock:
+            pnginfo = self._pnginfos.get(compress)
+            if pnginfo is None:
+                pnginfo = PngInfo()
+                for key, text in self.texts.items():
+                    pnginfo.add_text(key, text, zip=compress)
+                self._pnginfos[compress] = pnginfo
+            return pnginfo
+
+
+    def get_png_size(self, *, compress: bool = False) -> int:
+        """Returns the number of bytes that the metadata chunks occupy inside a PNG file."""
+        CHUNK_OVERHEAD = 12  #< length (4) + type (4) + CRC (4)
+        pnginfo = self.get_pnginfo(compress=compress)
+        return sum( len(chunk[1]) + CHUNK_OVERHEAD for chunk in pnginfo.chunks )
+
+
+    def get_exif(self, *, keys: tuple[str, ...] | None = None) -> bytes:
+        """
+        Returns the metadata encoded as an EXIF block (for WebP, JPEG, AVIF, ...)
+
+        The same layout used by the native ComfyUI nodes is followed: the
+        prompt is stored in the "Model" tag (0x0110) as "prompt:{json}" and the
+        remaining texts in descending tags starting at "Make" (0x010F) as
+        "{key}:{json}", so ComfyUI can load the workflow back from the image.
+
+        Args:
+            keys (optional): Only the texts with these keys are encoded. Defaults to None (all texts).
+        """
+        keys = tuple(keys) if keys is not None else None
+        with self._lock:
+            exif_bytes = self._exifs.get(keys)
+            if exif_bytes is None:
+                exif = Image.Exif()
+                tag  = 0x010F
+                for key, text in self.texts.items():
+                    if keys is not None and key not in keys:
+                        continue
+                    if key == "prompt":
+                        exif[0x0110] = f"prompt:{text}"
+                    else:
+                        exif[tag] = f"{key}:{text}"
+                        tag -= 1
+                exif_bytes = self._exifs[keys] = exif.tobytes()
+            return exif_bytes
+
+
+    def get_limited_exif(self, max_size: int) -> tuple[bytes, list[str]]:
+        """
+        Returns the metadata encoded as EXIF, dropping texts until it fits in `max_size` bytes.
+
+        The workflow is dropped first, then any other text except the prompt
+        and, as a last resort, the prompt itself.
+        Returns:
+            A tuple with the EXIF block and the list of keys that were dropped.
+        """
+        keys    = list(self.texts.keys())
+        dropped = []
+        removal_order = [ key for key in keys if key == "workflow" ] + \
+                        [ key for key in keys if key not in ("workflow", "prompt") ] + \
+                        [ key for key in keys if key == "prompt" ]
+        exif = self.get_exif()
+        for key in removal_order:
+            if len(exif) <= max_size:
+                break
+            keys.remove(key)
+            dropped.append(key)
+            exif = self.get_exif(keys=tuple(keys))
+        return exif, dropped
+
+
+    def get_size(self, format: str = "PNG", *, compress: bool = False) -> int:
+        """Returns the number of bytes that the metadata occupies inside a file of the given format."""
+        if format == "PNG":
+            return self.get_png_size(compress=compress)
+        if format == "JPEG":
+            return len(self.get_limited_exif(JPEG_MAX_EXIF_SIZE)[0])
+        return len(self.get_exif())
+
+
+
+#=========================== IMAGE METADATA CACHE ==========================#
+
+class ImageMetadataCache:
+    """
+    A small LRU cache of `ImageMetadata` objects.
+
+    Metadata is looked up by the identity of the objects it was generated from
+    (for example the `prompt` and `extra_pnginfo` dictionaries of an execution)
+    plus any option that affected the generation. Because different objects can
+    still produce the same texts (e.g. a job queued again), entries are also
+    deduplicated by content, so their encodings are reused as well.
+
+    Args:
+        max_entries (int): Maximum number of entries to keep in the cache.
+    """
+    def __init__(self, max_entries: int = 16):
+        self.max_entries   = max_entries
+        self._by_identity  = OrderedDict()
+        self._by_digest    = OrderedDict()
+        self._lock         = threading.Lock()
+
+
+    def get(self, sources: tuple, options: tuple = ()) -> ImageMetadata | None:
+        """
+        Returns the metadata generated from the given source objects or None if it's not cached.
+
+        Args:
+            sources (tuple): The objects from which the metadata was generated.
+            options (tuple): Hashable values with the options used during the generation.
+        """
+        key = self._identity_key(sources, options)
+        with self._lock:
+            entry = self._by_identity.get(key)
+            # the stored sources are compared to make sure the ids were not reused
+            if entry is None or any(a is not b for a, b in zip(entry[0], sources)):
+                return None
+            self._by_identity.move_to_end(key)
+            return entry[1]
+
+
+    def put(self, sources: tuple, options: tuple, metadata: ImageMetadata) -> ImageMetadata:
+        """
+        Stores the metadata generated from the given source objects.
+
+        Args:
+            sources  (tuple): The objects from which the metadata was generated.
+            options  (tuple): Hashable values with the options used during the generation.
+            metadata (ImageMetadata): The generated metadata.
+        Returns:
+            The cached metadata, which can be a previously stored instance with the same content.
+        """
+        key = self._identity_key(sources, options)
+        with self._lock:
+            metadata = self._by_digest.setdefault(metadata.digest, metadata)
+            self._by_digest.move_to_end(metadata.digest)
+            self._by_identity[key] = (sources, metadata)
+            self._by_identity.move_to_end(key)
+            while len(self._by_identity) > self.max_entries:
+                self._by_identity.popitem(last=False)
+            while len(self._by_digest) > self.max_entries:
+                self._by_digest.popitem(last=False)
+            return metadata
+
+
+    def clear(self):
+        """Removes all entries from the cache."""
+        with self._lock:
+            self._by_identity.clear()
+            self._by_digest.clear()
+
+
+    @staticmethod
+    def _identity_key(sources: tuple, options: tuple) -> tuple:
+        return ( tuple(id(source) for source in sources), options )
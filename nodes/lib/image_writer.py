@@ -0,0 +1,201 @@
+"""
+File    : image_writer.py
+Purpose : Pool of threads that encode and write images to disk in background.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 2, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+Encoding an image (mostly the zlib compression in the case of PNG) is done
+by Pillow without holding the GIL, so several images can be compressed at
+the same time on different CPU cores using plain threads.
+
+"""
+import os
+import atexit
+import threading
+import numpy as np
+from collections        import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from PIL                import Image
+from .system            import logger
+
+
+class ImageWriterPool:
+    """
+    A bounded pool of threads that encode and write images to disk in parallel.
+
+    The number of writes waiting to be completed is limited; when the limit
+    is reached `submit()` blocks the caller until one of the pending writes
+    finishes (back-pressure), so the memory used by queued frames is bounded.
+
+    Args:
+        max_workers (int): Maximum number of threads writing images in parallel.
+        max_pending (int): Maximum number of writes queued or in progress.
+    """
+    def __init__(self,
+                 max_workers: int,
+                 max_pending: int,
+                 ):
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(self.max_workers, int(max_pending))
+        self._executor   = None
+        self._slots      = threading.BoundedSemaphore(self.max_pending)
+        self._lock       = threading.Lock()
+        self._pending    = set()
+        self._counters   = OrderedDict()  #< (folder, filename_prefix) -> next free counter
+
+
+    def submit(self,
+               image    : Image.Image | np.ndarray,
+               file_path: str,
+               /,**save_args
+               ) -> Future:
+        """
+        Queues an image to be written to disk.
+
+        Args:
+            image     : The image to write, either a PIL image or a uint8 numpy array [H,W,C].
+            file_path : The full path of the file to create.
+            **save_args: Extra arguments forwarded to `PIL.Image.save()` (format, pnginfo, compress_level, ...)
+        Returns:
+            A future that resolves to `file_path` once the image is on disk.
+        """
+        self._slots.acquire() #< blocks while the queue is full
+        try:
+            future = self._get_executor().submit(self._write, image, file_path, save_args)
+        except:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._on_write_done)
+        return future
+
+
+    def reserve_counters(self,
+                         folder         : str,
+                         filename_prefix: str,
+                         counter        : int,
+                         count          : int,
+                         ) -> int:
+        """
+        Reserves `count` consecutive file counters for a folder and filename prefix.
+
+        ComfyUI calculates the next counter from the files already on disk, so
+        the images still queued in the pool are not taken into account. This
+        function returns the counter found on disk unless it was already given
+        to a previous batch, ensuring that two batches never share file names.
+
+        Args:
+            folder          (str): The folder where the images will be written.
+            filename_prefix (str): The prefix of the file names.
+            counter         (int): The next counter according to the files on disk.
+            count           (int): The number of counters to reserve.
+        Returns:
+            The first reserved counter.
+        """
+        MAX_ENTRIES = 1024
+        key = (os.path.normcase(os.path.abspath(folder)), filename_prefix)
+        with self._lock:
+            first = max(counter, self._counters.pop(key, counter))
+            self._counters[key] = first + count
+            while len(self._counters) > MAX_ENTRIES:
+                self._counters.popitem(last=False)
+            return first
+
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Waits until all pending writes are completed.
+
+        Args:
+            timeout (optional): Maximum number of seconds to wait. Defaults to None (no limit).
+        Returns:
+            True if all writes were completed, False if the timeout expired first.
+        """
+        with self._lock:
+            pending = list(self._pending)
+        if not pending:
+            return True
+        _, not_done = wait(pending, timeout=timeout)
+        return len(not_done) == 0
+
+
+    @property
+    def pending_count(self) -> int:
+        """The number of writes queued or in progress."""
+        with self._lock:
+            return len(self._pending)
+
+
+    #__ internal functions ________________________________
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers        = self.max_workers,
+                                                    thread_name_prefix = "zi_image_writer")
+            return self._executor
+
+
+    def _on_write_done(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
+        self._slots.release()
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Unable to write image to disk: {future.exception()}")
+
+
+    @staticmethod
+    def _write(image: Image.Image | np.ndarray, file_path: str, save_args: dict) -> str:
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        image.save(file_path, **save_args)
+        return file_path
+
+
+
+#========================== PROCESS-WIDE WRITER ============================#
+
+_image_writer: ImageWriterPool | None = None
+_image_writer_lock = threading.Lock()
+
+
+def get_image_writer() -> ImageWriterPool:
+    """
+    Returns the process-wide image writer pool, creating it on first use.
+
+    The number of threads can be configured with the `ZIMAGE_NODES_SAVE_THREADS`
+    environment variable, by default it uses up to 8 threads.
+    """
+    global _image_writer
+    with _image_writer_lock:
+        if _image_writer is None:
+            max_workers = _get_env_int("ZIMAGE_NODES_SAVE_THREADS", default=min(8, os.cpu_count() or 1))
+            _image_writer = ImageWriterPool(max_workers, max_pending=max_workers*4)
+            atexit.register(_image_writer.flush)
+        return _image_writer
+
+
+def flush_image_writes(timeout: float | None = None) -> bool:
+    """
+    Waits until all the images queued in the process-wide writer are on disk.
+
+    Args:
+        timeout (optional): Maximum number of seconds to wait. Defaults to None (no limit).
+    Returns:
+        True if all writes were completed, False if the timeout expired first.
+    """
+    return _image_writer.flush(timeout) if _image_writer else True
+
+
+def _get_env_int(name: str, *, default: int) -> int:
+    """Returns the integer value of an environment variable or `default` if it is not valid."""
+    try   : return max(1, int(os.getenv(name, "")))
+    except: return default
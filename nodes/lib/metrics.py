@@ -0,0 +1,195 @@
+"""
+File    : metrics.py
+Purpose : Process-wide registry of timings and other measurements taken while the nodes run.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 13, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+Each metric keeps aggregated values (count, sum, min, max, last) plus a
+window with the most recent samples used to compute percentiles, so the
+memory used does not grow with the number of executions. The registry can
+be dumped as JSON and is served by the `/zi_power/metrics` route.
+
+"""
+import json
+import time
+import threading
+from collections import deque
+from contextlib  import contextmanager
+from typing      import Any, Callable
+
+
+class Metric:
+    """
+    Aggregated statistics of a series of measurements.
+
+    Args:
+        window (int): Number of recent samples kept to compute percentiles.
+    """
+    def __init__(self, window: int = 512):
+        self.count   = 0
+        self.total   = 0.0
+        self.min     = None
+        self.max     = None
+        self.last    = None
+        self._recent = deque(maxlen=window)
+
+
+    def observe(self, value: float):
+        """Adds a new measurement."""
+        value       = float(value)
+        self.count += 1
+        self.total += value
+        self.min    = value if self.min is None else min(self.min, value)
+        self.max    = value if self.max is None else max(self.max, value)
+        self.last   = value
+        self._recent.append(value)
+
+
+    def percentile(self, percent: float) -> float | None:
+        """Returns a percentile [0..100] of the recent samples, or None if there are no samples."""
+        if not self._recent:
+            return None
+        values = sorted(self._recent)
+        index  = min(len(values) - 1, max(0, round(percent / 100.0 * (len(values) - 1))))
+        return values[index]
+
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the statistics as a dictionary ready to be serialized to JSON."""
+        return {
+            "count": self.count,
+            "sum"  : self.total,
+            "mean" : self.total / self.count if self.count else None,
+            "min"  : self.min,
+            "max"  : self.max,
+            "last" : self.last,
+            "p50"  : self.percentile(50),
+            "p95"  : self.percentile(95),
+            "p99"  : self.percentile(99),
+        }
+
+
+
+class MetricsRegistry:
+    """
+    A thread-safe collection of metrics identified by name and optional labels.
+
+    Labels are appended to the name in the form `name{key=value,...}`, for
+    example "zsampler.total_seconds{steps=9}", so the same measurement can be
+    tracked separately for each configuration.
+
+    Args:
+        window (int): Number of recent samples kept by each metric to compute percentiles.
+    """
+    def __init__(self, window: int = 512):
+        self.window   = window
+        self._metrics = {}
+        self._lock    = threading.Lock()
+
+
+    def observe(self, name: str, value: float, /,**labels):
+        """Adds a measurement to a metric, creating the metric if it does not exist."""
+        key = self.get_key(name, **labels)
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = Metric(self.window)
+            metric.observe(value)
+
+
+    @contextmanager
+    def timer(self, name: str, /,**labels):
+        """Measures the wall-clock seconds spent inside a `with` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+
+    def get(self, name: str, /,**labels) -> Metric | None:
+        """Returns a metric or None if nothing was measured yet."""
+        with self._lock:
+            return self._metrics.get( self.get_key(name, **labels) )
+
+
+    def reset(self):
+        """Removes all metrics."""
+        with self._lock:
+            self._metrics.clear()
+
+
+    def to_dict(self) -> dict[str, dict]:
+        """Returns the statistics of all metrics, sorted by key."""
+        with self._lock:
+            return { key: self._metrics[key].to_dict() for key in sorted(self._metrics) }
+
+
+    def to_json(self, **json_args) -> str:
+        """Returns the statistics of all metrics encoded as JSON."""
+        return json.dumps(self.to_dict(), **json_args)
+
+
+    @staticmethod
+    def get_key(name: str, /,**labels) -> str:
+        """Returns the key used to store a metric with the given name and labels."""
+        if not labels:
+            return name
+        return name + "{" + ",".join(f"{key}={labels[key]}" for key in sorted(labels)) + "}"
+
+
+
+#======================= STEP LATENCY INSTRUMENTATION ======================#
+
+class StepTimer:
+    """
+    A sampler callback that measures the time between consecutive steps and forwards the call.
+
+    The first step is measured from the moment the instance is created, so it
+    should be created just before starting the sampler. The time spent inside
+    the forwarded callback is excluded from the measurements.
+
+    Args:
+        callback (Callable): The sampler callback to forward the calls to (can be None).
+        registry (MetricsRegistry): Registry where the step latencies are stored.
+        name     (str): The name of the metric.
+        **labels : Labels of the metric.
+    """
+    def __init__(self,
+                 callback: Callable | None,
+                 registry: "MetricsRegistry",
+                 name    : str,
+                 /,**labels
+                 ):
+        self.callback = callback
+        self.registry = registry
+        self.name     = name
+        self.labels   = labels
+        self._last    = time.perf_counter()
+
+
+    def restart(self):
+        """Measures the next step from now, used when the sampler does not start right after creating the timer."""
+        self._last = time.perf_counter()
+
+
+    def __call__(self, *args, **kwargs):
+        self.registry.observe(self.name, time.perf_counter() - self._last, **self.labels)
+        try:
+            if self.callback:
+                return self.callback(*args, **kwargs)
+        finally:
+            # the time spent in the callback (e.g. decoding a preview) is not part of the next step
+            self._last = time.perf_counter()
+
+
+
+#======================== PROCESS-WIDE REGISTRY ============================#
+
+METRICS = MetricsRegistry()
@@ -20,6 +20,9 @@ There are two types of structures that store the nodes in ComfyUI:
 In general, the functions in this file operate on the "prompt" structure.
 
 """
+import threading
+from collections import OrderedDict, deque
+
 
 def get_class_type(node: dict) -> str:
     """Returns the class name of a node."""
@@ -129,46 +132,250 @@ def get_input_node(node: dict, input_name: str, *, nodes: dict) -> dict:
     return input_node if isinstance(input_node,dict) else {}
 
 
-def find_prompt(node: dict, type: str, *, nodes: dict, depth: int = 0) -> str:
+def find_prompt(node: dict, type: str, *, nodes: dict) -> str:
     """
     Returns the text prompt from a given node searching through its inputs.
     Args:
         node (dict): The current node under consideration.
         type       : The specific type of prompt to retrieve ('positive' or 'negative').
         nodes      : A dictionary containing all nodes in the workflow.
-        depth (optional): Internal parameter to track the recursion depth.
     """
-    if not isinstance(node,dict) or not node or depth >= 8:
+    if not isinstance(node,dict) or not node:
         return ""
+    graph   = get_prompt_graph(nodes)
+    node_id = graph.get_node_id(node)
+    return graph.find_prompt(node_id, type) if node_id is not None else ""
+
+
+
+#=============================== PROMPT GRAPH ==============================#
+
+# class_type -> names of the inputs through which the search for a prompt continues,
+# "{type}" in an input name is replaced by the type of prompt searched ('positive'/'negative')
+PROMPT_PASSTHROUGH_RULES: dict[str, tuple[str, ...]] = {
+    "ControlNetApply"              : ("conditioning",),
+    "ControlNetApplyAdvanced"      : ("{type}",),
+    "ControlNetApplySD3"           : ("{type}",),
+    "FluxGuidance"                 : ("conditioning",),
+    "ConditioningCombine"          : ("conditioning_1", "conditioning_2"),
+    "ConditioningConcat"           : ("conditioning_to", "conditioning_from"),
+    "ConditioningAverage"          : ("conditioning_to", "conditioning_from"),
+    "ConditioningSetArea"          : ("conditioning",),
+    "ConditioningSetAreaPercentage": ("conditioning",),
+    "ConditioningSetAreaStrength"  : ("conditioning",),
+    "ConditioningSetMask"          : ("conditioning",),
+    "ConditioningSetTimestepRange" : ("conditioning",),
+    "StylePromptEncoder"           : ("text",),
+}
+
+def register_prompt_passthrough(class_type: str, *input_names: str):
+    """
+    Registers a node class through which the search for a prompt must continue.
 
-    # in the first step of recursion, check if the `type` param is valid
-    if depth==0 and type not in ["positive","negative"]:
-        raise ValueError(f"Type must be 'positive' or 'negative', not '{type}'")
+    Args:
+        class_type   (str): The class type of the node (without the project suffix).
+        *input_names (str): The inputs to follow, "{type}" is replaced by 'positive'/'negative'.
+    """
+    PROMPT_PASSTHROUGH_RULES[class_type] = tuple(input_names)
 
-    # in the first step of recursion, node can be a sampler node with positive/negative inputs
-    if depth==0:
-        prompt_node = get_input_node(node, type, nodes=nodes)
-        if prompt_node:
-            return find_prompt(prompt_node, type, nodes=nodes, depth=depth+1)
 
-    #--------------------------------------------
-    # from this point, what we do is to traverse the connection chain until reaching a prompt
+class PromptGraph:
+    """
+    An indexed view of the "prompt" structure, built once per execution.
 
-    class_type = node.get("class_type", "")
+    The nodes are bucketed by class type and all wires are indexed in both
+    directions (forward: inputs of a node, reverse: nodes fed by a node), so
+    searches over the graph do not need to scan every node again.
+
+    Args:
+        nodes (dict): Dictionary containing all nodes (prompt structure).
+    """
+    def __init__(self, nodes: dict):
+        self.nodes = nodes if isinstance(nodes, dict) else {}
+        self._position_by_id     = {}  #< node_id -> position of the node inside `nodes`
+        self._id_by_node         = {}  #< id(node) -> node_id
+        self._ids_by_class_type  = {}  #< class_type -> [node_id, ...]
+        self._wires_by_id        = {}  #< node_id -> { input_name: source_node_id }
+        self._links_by_id        = {}  #< node_id -> [ (target_node_id, input_name), ... ]
+        self._ids_by_title_tag   = {}  #< title_tag -> [node_id, ...]  (filled on demand)
+        self._prompt_by_id       = {}  #< (node_id, type) -> prompt    (filled on demand)
+
+        for position, (node_id, node) in enumerate(self.nodes.items()):
+            if not isinstance(node, dict):
+                continue
+            self._position_by_id[node_id] = position
+            self._id_by_node[id(node)]    = node_id
+            self._ids_by_class_type.setdefault( get_class_type(node), [] ).append(node_id)
+
+            inputs = node.get("inputs")
+            wires  = {}
+            if isinstance(inputs, dict):
+                for input_name, wire in inputs.items():
+                    source_id = wire[0] if isinstance(wire,list) and len(wire)>0 else None
+                    if isinstance(source_id, str):
+                        wires[input_name] = source_id
+                        self._links_by_id.setdefault(source_id, []).append( (node_id, input_name) )
+            self._wires_by_id[node_id] = wires
+
+
+    def get_node(self, node_id: str | None) -> dict:
+        """Returns the node with the given id or an empty dictionary if it does not exist."""
+        node = self.nodes.get(node_id) if node_id is not None else None
+        return node if isinstance(node, dict) else {}
+
+
+    def get_node_id(self, node: dict) -> str | None:
+        """Returns the id of a node object of this graph, or None if the node is not part of it."""
+        return self._id_by_node.get(id(node))
+
+
+    def get_input_id(self, node_id: str, input_name: str) -> str | None:
+        """Returns the id of the node connected to the given input, or None if the input is not a wire."""
+        wires = self._wires_by_id.get(node_id)
+        return wires.get(input_name) if wires else None
+
+
+    def get_input_node(self, node_id: str, input_name: str) -> dict:
+        """Returns the node connected to the given input, or an empty dictionary if there is no connection."""
+        return self.get_node( self.get_input_id(node_id, input_name) )
+
+
+    def get_output_links(self, node_id: str) -> list[tuple[str, str]]:
+        """Returns a list of (target_node_id, input_name) for each wire leaving the given node."""
+        return self._links_by_id.get(node_id, [])
+
+
+    def get_ids_by_class_type(self, *class_types: str) -> list[str]:
+        """
+        Returns the ids of all nodes of the given class types, in the same order they appear in the prompt.
+        The class types are compared after removing the project suffix (see `get_class_type()`).
+        """
+        if len(class_types) == 1:
+            return self._ids_by_class_type.get(class_types[0], [])
+        ids = [ id for class_type in class_types for id in self._ids_by_class_type.get(class_type, []) ]
+        return sorted(ids, key=self._position_by_id.__getitem__)
+
+
+    def get_ids_by_title_tag(self, title_tag: str) -> list[str]:
+        """Returns the ids of all nodes whose title contains `title_tag`, in the same order they appear in the prompt."""
+        ids = self._ids_by_title_tag.get(title_tag)
+        if ids is None:
+            ids = []
+            for node_id in self._position_by_id:
+                meta  = self.nodes[node_id].get("_meta")
+                title = meta.get("title") if isinstance(meta,dict) else None
+                if isinstance(title,str) and title_tag in title:
+                    ids.append(node_id)
+            self._ids_by_title_tag[title_tag] = ids
+        return ids
+
+
+    def find_prompt(self, node_id: str, type: str) -> str:
+        """
+        Returns the text prompt feeding a given node, searching upstream through its inputs.
+
+        The search is breadth-first, so the prompt closest to the node is the
+        one returned. Each node is visited only once (cycles are safe) and the
+        result is memoized, so asking again for the same node costs nothing.
+
+        Args:
+            node_id (str): The id of the node under consideration (usually a sampler).
+            type    (str): The specific type of prompt to retrieve ('positive' or 'negative').
+
+        Example:
+            >>> graph = PromptGraph({
+            ...     "1": {"class_type": "StylePromptEncoder", "inputs": {"text": "a red fox"}},
+            ...     "2": {"class_type": "KSampler", "inputs": {"positive": ["1", 0], "negative": ["3", 0]}},
+            ...     "3": {"class_type": "KSampler", "inputs": {"positive": ["2", 0], "negative": ["2", 0]}},
+            ... })
+            >>> graph.find_prompt("2", "positive")
+            'a red fox'
+            >>> graph.find_prompt("2", "negative")
+            ''
+        """
+        if type not in ["positive","negative"]:
+            raise ValueError(f"Type must be 'positive' or 'negative', not '{type}'")
+
+        key = (node_id, type)
+        if key not in self._prompt_by_id:
+            # the node can be a sampler node with positive/negative inputs,
+            # in that case the search starts from the connected node
+            # (the empty result stored beforehand stops cycles through these inputs)
+            self._prompt_by_id[key] = ""
+            start_id = self.get_input_id(node_id, type)
+            if start_id is not None and self.get_node(start_id):
+                prompt = self.find_prompt(start_id, type)
+            else:
+                prompt = self._find_nearest_prompt(node_id, type)
+            self._prompt_by_id[key] = prompt
+        return self._prompt_by_id[key]
+
+
+    def _find_nearest_prompt(self, start_id: str, type: str) -> str:
+        TEXT_NAMES = ("text", "text_g", f"text_{type}", "populated_text")
+        visited    = {start_id}
+        queue      = deque([start_id])
+
+        def enqueue(input_names: tuple[str, ...]):
+            for input_name in input_names:
+                source_id = self.get_input_id(node_id, input_name.format(type=type))
+                if source_id is not None and source_id not in visited:
+                    visited.add(source_id)
+                    queue.append(source_id)
+
+        while queue:
+            node_id = queue.popleft()
+            node    = self.get_node(node_id)
+            if not node:
+                continue
+
+            # conditioning nodes that only modify their input(s), the search goes through them
+            # (only when those inputs are wired, e.g. a StylePromptEncoder with a literal text is a prompt)
+            input_names = PROMPT_PASSTHROUGH_RULES.get( get_class_type(node), () )
+            input_names = [ name for name in input_names if self.get_input_id(node_id, name.format(type=type)) is not None ]
+            if input_names:
+                enqueue(input_names)
+                continue
+
+            # the text of the node comes from another node
+            if self.get_input_id(node_id, "text") is not None:
+                enqueue( ("text",) )
+                continue
+
+            # check if we are in a node that contains prompt
+            for name in TEXT_NAMES:
+                prompt: str = get_input_string(node, name)
+                if prompt:
+                    return prompt
+
+            # unknown node modifying a conditioning, keep searching through it
+            enqueue( ("conditioning",) )
+
+        return ""
 
-    if class_type == "ControlNetApply" or class_type == "FluxGuidance":
-        conditioning_node = get_input_node( node,"conditioning", nodes=nodes )
-        return find_prompt(conditioning_node, type, nodes=nodes, depth=depth+1)
 
-    text_node = get_input_node( node,"text", nodes=nodes )
-    if text_node:
-        return find_prompt(text_node, type, nodes=nodes, depth=depth+1)
 
-    # finally check if we are in a node that contains prompt
-    TEXT_NAMES = ("text", "text_g", f"text_{type}", "populated_text")
-    for name in TEXT_NAMES:
-        prompt: str = get_input_string(node, name)
-        if prompt:
-            return prompt
+_prompt_graphs      = OrderedDict()
+_prompt_graphs_lock = threading.Lock()
 
-    return ""
\ No newline at end of file
+def get_prompt_graph(nodes: dict) -> PromptGraph:
+    """
+    Returns the `PromptGraph` of the given prompt structure.
+
+    The graph is built the first time it is requested and reused while the
+    same `nodes` object is alive, so all the nodes saving/inspecting the
+    prompt during an execution share a single index.
+    """
+    MAX_GRAPHS = 4
+    with _prompt_graphs_lock:
+        entry = _prompt_graphs.get(id(nodes))
+        if entry and entry[0] is nodes:
+            _prompt_graphs.move_to_end(id(nodes))
+            return entry[1]
+
+    graph = PromptGraph(nodes)
+    with _prompt_graphs_lock:
+        _prompt_graphs[id(nodes)] = (nodes, graph)
+        while len(_prompt_graphs) > MAX_GRAPHS:
+            _prompt_graphs.popitem(last=False)
+    return graph
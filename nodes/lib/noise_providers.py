@@ -0,0 +1,184 @@
+"""
+File    : noise_providers.py
+Purpose : Different ways to generate the initial noise used by the samplers.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 15, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+All providers share the same interface: `generate(samples, seed, batch_index)`
+returns a noise tensor with the shape of `samples`. The tensors returned can
+be shared between calls (cached noise) or be views that do not own memory
+(zero noise), so they must be treated as read-only.
+
+"""
+import os
+import threading
+import torch
+import comfy.sample
+from collections import OrderedDict
+
+
+class NoiseProvider:
+    """Base class of all noise providers."""
+
+    def generate(self,
+                 samples    : torch.Tensor,
+                 seed       : int,
+                 batch_index: list[int] | None = None,
+                 ) -> torch.Tensor:
+        """
+        Returns the noise for a batch of latent samples.
+        Args:
+            samples    : The latent samples, only its shape, dtype and layout are used.
+            seed       : The seed of the random generator.
+            batch_index: Optional index of each sample inside a bigger batch (see `comfy.sample.prepare_noise`)
+        """
+        raise NotImplementedError
+
+
+
+class ZeroNoise(NoiseProvider):
+    """
+    Noise made of zeros, returned as a broadcast view of a single element.
+
+    No memory is allocated for the noise and, when `device` is the compute
+    device, ComfyUI does not need to copy it either.
+
+    Args:
+        device (optional): The device where the view is created. Defaults to "cpu".
+    """
+    def __init__(self, device: str | torch.device = "cpu"):
+        self.device = device
+
+
+    def generate(self, samples, seed, batch_index=None) -> torch.Tensor:
+        zero = torch.zeros((), dtype=samples.dtype, device=self.device)
+        return zero.expand(samples.shape)
+
+
+
+class SeededNoise(NoiseProvider):
+    """
+    Noise generated with `comfy.sample.prepare_noise`, the same used by the native ComfyUI samplers.
+
+    It's generated on the CPU, so the results are identical on every machine.
+    """
+    def generate(self, samples, seed, batch_index=None) -> torch.Tensor:
+        return comfy.sample.prepare_noise(samples, seed, batch_index)
+
+
+
+class DeviceNoise(NoiseProvider):
+    """
+    Seeded noise generated directly on the compute device.
+
+    It follows the same procedure as `comfy.sample.prepare_noise` but with a
+    generator on `device`, avoiding the generation on the CPU and the copy to
+    the device. The result is reproducible on the same kind of device but is
+    NOT identical to the CPU noise of `SeededNoise`.
+
+    Args:
+        device: The device where the noise is generated.
+    """
+    def __init__(self, device: str | torch.device):
+        self.device = torch.device(device)
+
+
+    def generate(self, samples, seed, batch_index=None) -> torch.Tensor:
+        generator = torch.Generator(device=self.device).manual_seed(seed)
+        options   = { "dtype": samples.dtype, "layout": samples.layout, "device": self.device, "generator": generator }
+        if batch_index is None:
+            return torch.randn(samples.shape, **options)
+
+        # generate noise for every index up to the highest one,
+        # but only keep the ones that are actually referenced
+        indexes = sorted(set(batch_index))
+        noises  = {}
+        for index in range(indexes[-1] + 1):
+            noise = torch.randn([1] + list(samples.shape[1:]), **options)
+            if index in indexes:
+                noises[index] = noise
+        return torch.cat([ noises[index] for index in batch_index ], dim=0)
+
+
+
+class CachedNoise(NoiseProvider):
+    """
+    Keeps the most recent noise tensors generated by another provider and reuses them.
+
+    Useful when the same seed is used again and again (e.g. the fixed seed of
+    the last stage of ZSampler Turbo), the noise is generated once and reused
+    by later stages and jobs with the same latent shape.
+
+    Args:
+        provider    (NoiseProvider): The provider that generates the noise when it's not cached.
+        max_entries (int): Maximum number of tensors kept in the cache.
+    """
+    def __init__(self, provider: NoiseProvider, max_entries: int = 4):
+        self.provider    = provider
+        self.max_entries = max_entries
+        self._entries    = OrderedDict()
+        self._lock       = threading.Lock()
+
+
+    def generate(self, samples, seed, batch_index=None) -> torch.Tensor:
+        key = (seed, tuple(samples.shape), samples.dtype, samples.layout, tuple(batch_index) if batch_index is not None else None)
+        with self._lock:
+            noise = self._entries.get(key)
+            if noise is not None:
+                self._entries.move_to_end(key)
+                return noise
+        noise = self.provider.generate(samples, seed, batch_index)
+        with self._lock:
+            self._entries[key] = noise
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return noise
+
+
+    def clear(self):
+        """Removes all cached tensors."""
+        with self._lock:
+            self._entries.clear()
+
+
+
+#============================ HELPER FUNCTIONS =============================#
+
+NOISE_MODES = ("compatible", "device")
+
+def get_noise_mode() -> str:
+    """
+    Returns how the seeded noise is generated, configured with the `ZIMAGE_NODES_NOISE` environment variable:
+      - "compatible": on the CPU, identical to the native ComfyUI samplers (default)
+      - "device"    : directly on the compute device, faster but with different results
+    """
+    mode = os.getenv("ZIMAGE_NODES_NOISE", "").strip().lower()
+    return mode if mode in NOISE_MODES else "compatible"
+
+
+def get_seeded_noise_provider(device: str | torch.device) -> NoiseProvider:
+    """Returns the provider of seeded noise for the configured noise mode."""
+    if get_noise_mode() == "device":
+        return DeviceNoise(device)
+    return SEEDED_NOISE
+
+
+def get_fixed_seed_noise_provider(device: str | torch.device) -> CachedNoise:
+    """Returns a provider that caches the noise of seeds used repeatedly, one for each noise mode and device."""
+    key = (get_noise_mode(), str(device))
+    with _cached_providers_lock:
+        provider = _cached_providers.get(key)
+        if provider is None:
+            provider = _cached_providers[key] = CachedNoise( get_seeded_noise_provider(device) )
+        return provider
+
+
+SEEDED_NOISE            = SeededNoise()
+_cached_providers       = {}
+_cached_providers_lock  = threading.Lock()
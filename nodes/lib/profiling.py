@@ -0,0 +1,114 @@
+"""
+File    : profiling.py
+Purpose : Opt-in timing of the extension startup (imports, node registration, style parsing, ...)
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 12, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+The profiler is enabled with the `ZIMAGE_NODES_PROFILE` environment variable.
+When it is disabled, `profile()` returns a shared no-op context manager, so
+the instrumented code pays only for a function call.
+
+"""
+import os
+import time
+import threading
+from contextlib import nullcontext, contextmanager
+from typing     import NamedTuple
+from .          import system
+
+
+class ProfileRecord(NamedTuple):
+    section : str    #< kind of operation measured ("import", "register", "define_schema", "style parse", ...)
+    label   : str    #< what was measured (module, node or style group name)
+    seconds : float  #< elapsed wall-clock time
+
+
+class StartupProfiler:
+    """
+    Collects the time spent in each measured operation until `report()` is called.
+
+    Measurements can be nested (e.g. a style parse inside a `define_schema`),
+    in that case the time of the inner one is also included in the outer one.
+
+    Args:
+        enabled (bool): Whether the measurements are recorded.
+    """
+    def __init__(self, enabled: bool):
+        self.enabled  = enabled
+        self._records = []
+        self._lock    = threading.Lock()
+
+
+    def measure(self, section: str, label: str):
+        """Returns a context manager that records the time spent inside it (or does nothing if disabled)."""
+        if not self.enabled:
+            return _NO_MEASURE
+        return self._measure(section, label)
+
+
+    def report(self, title: str = "Startup profile", /,*, max_lines: int = 40):
+        """
+        Logs the recorded measurements sorted from slowest to fastest and stops recording.
+
+        Args:
+            title     (str): The title of the report.
+            max_lines (int): Maximum number of individual measurements to list.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            records, self._records = self._records, []
+            self.enabled = False
+
+        totals = {}
+        for record in records:
+            count, seconds = totals.get(record.section, (0, 0.0))
+            totals[record.section] = (count + 1, seconds + record.seconds)
+
+        lines = [f"{title}: {len(records)} measurements (nested measurements are included in their parent)"]
+        for section, (count, seconds) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"  {seconds*1000:9.2f} ms  {section} (x{count})")
+        lines.append("  - - - - - - - - - - - -")
+        for record in sorted(records, key=lambda record: -record.seconds)[:max_lines]:
+            lines.append(f"  {record.seconds*1000:9.2f} ms  {record.section:<14} {record.label}")
+        # the logger is taken from the module because it's created after this file is imported
+        system.logger.info("\n".join(lines))
+
+
+    #__ internal functions ________________________________
+
+    @contextmanager
+    def _measure(self, section: str, label: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                if self.enabled:
+                    self._records.append( ProfileRecord(section, label, elapsed) )
+
+
+
+#========================= PROCESS-WIDE PROFILER ===========================#
+
+_NO_MEASURE = nullcontext()
+
+STARTUP_PROFILER = StartupProfiler( enabled=bool(os.getenv("ZIMAGE_NODES_PROFILE")) )
+
+
+def profile(section: str, label: str):
+    """
+    Measures the time spent inside a `with` block when `ZIMAGE_NODES_PROFILE` is set.
+
+    Example:
+        >>> with profile("import", "nodes.save_image"):
+        ...     from .nodes.save_image import SaveImage
+    """
+    return STARTUP_PROFILER.measure(section, label)
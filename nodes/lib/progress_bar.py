@@ -10,10 +10,13 @@ License : MIT
          ComfyUI nodes designed specifically for the "Z-Image" model.
 _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
 """
+import os
+import time
 import torch
 import latent_preview
-from typing      import Any
+from typing      import Any, NamedTuple
 from comfy.utils import ProgressBar as ComfyProgressBar
+from .system     import logger
 
 
 #============================== PROGRESS BAR ===============================#
@@ -86,22 +89,93 @@ class ProgressBar:
 
 
 
+#============================= PREVIEW POLICY ==============================#
+class PreviewPolicy(NamedTuple):
+    """
+    Rules that limit how often the live preview is decoded.
+
+    The progress bar is always updated, only the (expensive) decoding of the
+    preview image is skipped. The preview of the last step is always decoded.
+    """
+    min_interval_ms : float = 0.0   #< minimum milliseconds between two previews
+    every_n         : int   = 1     #< decode the preview only every N steps
+    first_batch_only: bool  = False #< only the first image of the batch is sent to the previewer
+    downsample      : int   = 1     #< spatial reduction factor applied to the latent before decoding
+    final_stage_only: bool  = False #< multi-stage samplers only show the preview during the last stage
+
+    @classmethod
+    def from_string(cls, text: str) -> "PreviewPolicy":
+        """
+        Creates a policy from a comma-separated list of `key=value` pairs.
+        Example: "min_interval_ms=250, every_n=2, downsample=2, final_stage_only=1"
+        """
+        values = {}
+        for item in text.replace(";", ",").split(","):
+            key, _, value = item.partition("=")
+            key, value    = key.strip().lower(), value.strip().lower()
+            if not key:
+                continue
+            if key not in cls._fields:
+                logger.warning(f"Unknown preview policy option '{key}', valid options: {', '.join(cls._fields)}")
+                continue
+            try:
+                field_type  = type(cls._field_defaults[key])
+                values[key] = value in ("1", "true", "yes", "on") if field_type is bool else field_type(value)
+            except ValueError:
+                logger.warning(f"Invalid value '{value}' for the preview policy option '{key}'")
+        policy = cls(**values)
+        return policy._replace(every_n    = max(1, int(policy.every_n)),
+                               downsample = max(1, int(policy.downsample)))
+
+
+    def prepare_latent(self, x0: torch.Tensor) -> torch.Tensor:
+        """Reduces the latent according to the policy before it is decoded as a preview."""
+        if self.first_batch_only and x0.shape[0] > 1:
+            x0 = x0[:1]
+        if self.downsample > 1:
+            # a strided view is enough, the previewer resizes the image anyway
+            x0 = x0[..., ::self.downsample, ::self.downsample]
+        return x0
+
+
+def get_preview_policy() -> PreviewPolicy:
+    """Returns the preview policy configured with the `ZIMAGE_NODES_PREVIEW` environment variable."""
+    return PreviewPolicy.from_string( os.getenv("ZIMAGE_NODES_PREVIEW", "") )
+
+
+
 #===================== PROGRESS BAR WITH LIVE PREVIEW ======================#
 class ProgressPreview:
+    """
+    A sampler callback that updates a parent progress bar, allowing nested progress ranges.
 
+    Args:
+        steps    (int): The total number of steps for the current task.
+        parent (tuple): The parent callback with the range of progress values where this task begins and ends.
+        preview (optional): If False, the latent is not forwarded to the parent, so no preview is decoded.
+    """
     def __init__(self,
-                 steps : int,
-                 parent: tuple[Any, int, int],
+                 steps  : int,
+                 parent : tuple[Any, int, int],
+                 preview: bool = True,
                  ):
         self.parent    = parent[0]
         self.range_min = int(parent[1])
         self.range_max = int(parent[2])
         self.total     = steps
+        self.preview   = preview
 
 
     @classmethod
-    def from_comfyui(cls, model: object, steps: int):
-        callback = latent_preview.prepare_callback(model, steps)
+    def from_comfyui(cls, model: object, steps: int, *, policy: PreviewPolicy | None = None):
+        """
+        Creates the root ProgressPreview that updates ComfyUI's progress bar and live preview.
+        Args:
+            model            : The ComfyUI model being sampled (used to select the previewer).
+            steps       (int): The total number of steps.
+            policy (optional): The rules that limit the preview decoding. Defaults to the configured policy.
+        """
+        callback = _ComfyPreviewCallback(model, steps, policy or get_preview_policy())
         return cls(steps, parent=(callback, 0, steps))
 
 
@@ -120,5 +194,36 @@ class ProgressPreview:
         # apply the progress level to the parent bar
         if self.parent:
             parent_value = self.range_min + (progress_level * (self.range_max - self.range_min))
-            self.parent( int(parent_value), x0, x, None )
+            self.parent( int(parent_value), x0 if self.preview else None, x, None )
+
+
 
+class _ComfyPreviewCallback:
+    """
+    Same as the callback returned by `latent_preview.prepare_callback()` but
+    decoding the preview only when the policy allows it.
+    """
+    def __init__(self, model: object, steps: int, policy: PreviewPolicy):
+        self.previewer     = latent_preview.get_previewer(model.load_device, model.model.latent_format)
+        self.progress_bar  = ComfyProgressBar(steps)
+        self.steps         = steps
+        self.policy        = policy
+        self._last_preview = None
+
+
+    def __call__(self, step: int, x0: torch.Tensor | None, x: torch.Tensor, total_steps: int | None):
+        preview_bytes = None
+        if x0 is not None and self.previewer and self._should_preview(step, total_steps or self.steps):
+            preview_bytes      = self.previewer.decode_latent_to_preview_image("JPEG", self.policy.prepare_latent(x0))
+            self._last_preview = time.monotonic()
+        self.progress_bar.update_absolute(step + 1, total_steps, preview_bytes)
+
+
+    def _should_preview(self, step: int, total_steps: int) -> bool:
+        if step + 1 >= total_steps:
+            return True
+        if (step + 1) % self.policy.every_n != 0:
+            return False
+        if self.policy.min_interval_ms > 0 and self._last_preview is not None:
+            return (time.monotonic() - self._last_preview) * 1000.0 >= self.policy.min_interval_ms
+        return True
@@ -0,0 +1,217 @@
+"""
+File    : sigma_schedules.py
+Purpose : Registry of the three-stage sigma schedules used by ZSampler Turbo.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 14, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+Schedules are loaded from JSON files with the following format:
+
+    {
+        "turbo-9": {
+            "composition": [0.991, 0.98, 0.92],
+            "details"    : [0.935, 0.90, 0.875, 0.750, 0.0000],
+            "refinement" : [0.6582, 0.4556, 0.2000, 0.0000]
+        },
+        ...
+    }
+
+The number of steps of a schedule is the sum of the steps of its three stages
+(the number of sigmas minus one in each stage).
+
+"""
+import os
+import json
+import threading
+import torch
+from typing  import NamedTuple
+from .system import logger
+
+STAGE_NAMES = ("composition", "details", "refinement")
+
+
+class SigmaSchedule(NamedTuple):
+    """A named set of sigmas for each of the three denoising stages."""
+    name       : str
+    composition: tuple[float, ...]  #< sigmas of the first stage (noise from the seed)
+    details    : tuple[float, ...]  #< sigmas of the second stage (no extra noise)
+    refinement : tuple[float, ...]  #< sigmas of the third stage (noise from a fixed seed)
+
+    @property
+    def steps(self) -> int:
+        """The total number of denoising steps of the schedule."""
+        return sum( len(sigmas) - 1 for sigmas in self.stages )
+
+    @property
+    def stages(self) -> tuple[tuple[float, ...], ...]:
+        """The sigmas of the three stages, in order."""
+        return (self.composition, self.details, self.refinement)
+
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict) -> "SigmaSchedule":
+        """
+        Creates a schedule from its JSON representation, validating its content.
+        Raises ValueError if the schedule is not valid.
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f'Sigma schedule "{name}" must be an object with the keys {", ".join(STAGE_NAMES)}.')
+        stages = []
+        for stage_name in STAGE_NAMES:
+            sigmas = data.get(stage_name)
+            if not isinstance(sigmas, list) or not all(isinstance(x, (int, float)) for x in sigmas):
+                raise ValueError(f'Sigma schedule "{name}" must define "{stage_name}" as a list of numbers.')
+            stages.append( tuple(float(x) for x in sigmas) )
+        schedule = cls(name, *stages)
+        schedule.validate()
+        return schedule
+
+
+    def validate(self):
+        """Raises ValueError if any stage has less than two sigmas or is not strictly decreasing."""
+        for stage_name, sigmas in zip(STAGE_NAMES, self.stages):
+            if len(sigmas) < 2:
+                raise ValueError(f'Sigma schedule "{self.name}": the stage "{stage_name}" needs at least two sigmas.')
+            if any(sigma < 0.0 for sigma in sigmas):
+                raise ValueError(f'Sigma schedule "{self.name}": the stage "{stage_name}" contains negative sigmas.')
+            if any(current <= following for current, following in zip(sigmas, sigmas[1:])):
+                raise ValueError(f'Sigma schedule "{self.name}": the sigmas of the stage "{stage_name}" must be strictly decreasing.')
+
+
+
+class SigmaScheduleRegistry:
+    """
+    A collection of sigma schedules with their tensors cached per device and dtype.
+
+    When several schedules have the same number of steps, the one registered
+    last is used for that number of steps.
+    """
+    def __init__(self):
+        self._schedules = {}  #< name  -> SigmaSchedule
+        self._by_steps  = {}  #< steps -> SigmaSchedule
+        self._tensors   = {}  #< (schedule, device, dtype) -> tuple of tensors
+        self._lock      = threading.Lock()
+
+
+    def register(self, schedule: SigmaSchedule):
+        """Adds a schedule (or replaces the one with the same name) after validating it."""
+        schedule.validate()
+        with self._lock:
+            self._schedules.pop(schedule.name, None)
+            self._schedules[schedule.name] = schedule
+            self._by_steps = { s.steps: s for s in self._schedules.values() }
+            self._tensors  = { key: value for key, value in self._tensors.items() if key[0].name != schedule.name }
+
+
+    def load_file(self, file_path: str) -> int:
+        """
+        Registers all the schedules defined in a JSON file.
+        Returns:
+            The number of schedules loaded.
+        Raises:
+            ValueError if the file content is not valid (no schedule is registered in that case).
+        """
+        with open(file_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if not isinstance(data, dict):
+            raise ValueError(f"The file '{file_path}' must contain an object mapping names to sigma schedules.")
+        schedules = [ SigmaSchedule.from_dict(name, schedule) for name, schedule in data.items() ]
+        for schedule in schedules:
+            self.register(schedule)
+        return len(schedules)
+
+
+    def get(self, name: str) -> SigmaSchedule | None:
+        """Returns a schedule by its name or None if it does not exist."""
+        return self._schedules.get(name)
+
+
+    def get_for_steps(self, steps: int) -> SigmaSchedule:
+        """
+        Returns the schedule for a number of steps.
+        If there isn't one with exactly that number of steps, the closest one with fewer steps is used
+        (or the one with the fewest steps if all have more). Raises LookupError if the registry is empty.
+        """
+        schedule = self._by_steps.get(steps)
+        if schedule is None:
+            if not self._by_steps:
+                raise LookupError("No sigma schedule has been registered.")
+            lower    = [ n for n in self._by_steps if n <= steps ]
+            schedule = self._by_steps[ max(lower) if lower else min(self._by_steps) ]
+        return schedule
+
+
+    def get_tensors(self,
+                    schedule: SigmaSchedule,
+                    device  : str | torch.device = "cpu",
+                    dtype   : torch.dtype        = torch.float32,
+                    ) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Returns the sigmas of the three stages as tensors, created only once for each device and dtype.
+        The returned tensors are shared and must not be modified.
+        """
+        key     = (schedule, str(device), dtype)
+        tensors = self._tensors.get(key)
+        if tensors is None:
+            tensors = tuple( torch.tensor(sigmas, device=device, dtype=dtype) for sigmas in schedule.stages )
+            with self._lock:
+                self._tensors[key] = tensors
+        return tensors
+
+
+    @property
+    def min_steps(self) -> int:
+        return min(self._by_steps) if self._by_steps else 0
+
+    @property
+    def max_steps(self) -> int:
+        return max(self._by_steps) if self._by_steps else 0
+
+
+    def get_names(self) -> list[str]:
+        """Returns the names of all registered schedules."""
+        return list( self._schedules.keys() )
+
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+
+
+#======================== PROCESS-WIDE REGISTRY ============================#
+
+_DEFAULT_SCHEDULES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "sigma_schedules.json")
+
+_sigma_schedules: SigmaScheduleRegistry | None = None
+_sigma_schedules_lock = threading.Lock()
+
+
+def get_sigma_schedules() -> SigmaScheduleRegistry:
+    """
+    Returns the process-wide registry of sigma schedules, loading it on first use.
+
+    Besides the default schedules, the JSON files listed in the environment
+    variable `ZIMAGE_NODES_SIGMA_SCHEDULES` (separated by the system path
+    separator) are loaded too; their schedules replace the default ones with
+    the same name or the same number of steps.
+    """
+    global _sigma_schedules
+    with _sigma_schedules_lock:
+        if _sigma_schedules is None:
+            registry = SigmaScheduleRegistry()
+            registry.load_file(_DEFAULT_SCHEDULES_FILE)
+            for file_path in os.getenv("ZIMAGE_NODES_SIGMA_SCHEDULES", "").split(os.pathsep):
+                if not file_path.strip():
+                    continue
+                try:
+                    count = registry.load_file( os.path.expanduser(file_path.strip()) )
+                    logger.info(f"Loaded {count} sigma schedules from '{file_path}'.")
+                except (OSError, ValueError) as error:
+                    logger.error(f"Unable to load the sigma schedules from '{file_path}': {error}")
+            _sigma_schedules = registry
+        return _sigma_schedules
@@ -10,7 +10,88 @@ License : MIT
          ComfyUI nodes designed specifically for the "Z-Image" model.
 _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
 """
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from functools   import lru_cache
+from typing      import Iterable, NamedTuple
+from .system     import logger
 
+
+#============================== STYLE TEMPLATE =============================#
+class StyleTemplate:
+    """
+    A style template parsed once into literal segments and placeholder slots.
+
+    Placeholders have the form "{$name}"; the prompt to be styled goes in
+    "{$@}" and the optional spicy content in "{$spicy-content-with}". Any
+    placeholder without a value when rendering is kept as literal text.
+
+    Args:
+        text (str): The template text.
+
+    Attributes:
+        text         (str): The original template text.
+        placeholders (frozenset): The names of all placeholders found in the template.
+    """
+    PLACEHOLDER_REGEX = re.compile(r"\{\$([^{}\s]+)\}")
+
+    def __init__(self, text: str):
+        parts = self.PLACEHOLDER_REGEX.split(text)
+        self.text          = text
+        self._literals     = parts[0::2]  #< always one more literal than placeholders
+        self._names        = parts[1::2]
+        self.placeholders  = frozenset(self._names)
+
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def compile(text: str) -> "StyleTemplate":
+        """Returns the compiled template for a given text, reusing previously compiled ones."""
+        return StyleTemplate(text)
+
+
+    def render(self, values: dict[str, str]) -> str:
+        """
+        Renders the template replacing each placeholder with its value.
+        Args:
+            values (dict): A dictionary mapping placeholder names to their values.
+        Returns:
+            The rendered text.
+        """
+        literals = self._literals
+        pieces   = [ literals[0] ]
+        for index, name in enumerate(self._names, start=1):
+            value = values.get(name)
+            pieces.append( value if value is not None else f"{{${name}}}" )
+            pieces.append( literals[index] )
+        return "".join(pieces)
+
+
+    def __bool__(self) -> bool:
+        """An empty template evaluates to False, the same as an empty template string."""
+        return bool(self.text)
+
+
+    def __str__(self) -> str:
+        return self.text
+
+
+
+#============================= STYLE DIAGNOSTIC ============================#
+class StyleDiagnostic(NamedTuple):
+    """A problem found while parsing style definitions."""
+    source     : str  #< the origin of the definitions (e.g. a file path), can be empty
+    line_number: int  #< the line (starting at 1) where the affected style is defined
+    message    : str  #< a description of the problem
+
+    def __str__(self) -> str:
+        return f"{self.source or '<string>'}:{self.line_number}: {self.message}"
+
+
+
+#=============================== STYLE GROUP ===============================#
 class StyleGroup:
     """
     A group of style templates indexed by name.
@@ -39,8 +120,11 @@ class StyleGroup:
         self.category = category
         self.version  = version
         self._templates_by_lowername = {}
+        self._compiled_by_lowername  = {}
         self._names_by_lowername     = {}
         self._ordered_names          = []
+        self._frozen                 = False
+        self.diagnostics: list[StyleDiagnostic] = []  #< problems found while parsing the styles
 
         # if no styles are provided then leave everything empty and do nothing
         if styles is None:
@@ -76,14 +160,82 @@ class StyleGroup:
         Returns:
             A new instance of `StyleGroup` parsed from the input string.
         """
-        style_group = StyleGroup(category=category, version=version)
-        action  = None
-        content = ""
+        return cls.from_lines(string.splitlines(), category=category, version=version)
+
+
+    @classmethod
+    def from_file(cls,
+                  file_path : str,
+                  /,*,
+                  category  : str = "",
+                  version   : str = "",
+                  encoding  : str = "utf-8",
+                  ) -> "StyleGroup":
+        """
+        Creates a StyleGroup instance from a text file containing style definitions.
+
+        The file is read line by line, so large style libraries can be loaded
+        without holding the whole file in memory.
+
+        Args:
+            file_path (str): The path to the file containing the style definitions.
+            category  (str): The category of the style group. Defaults to an empty string.
+            version   (str): The version of the style group. Defaults to an empty string.
+            encoding  (str): The text encoding of the file. Defaults to "utf-8".
+        """
+        with open(file_path, "r", encoding=encoding) as file:
+            return cls.from_lines(file, category=category, version=version, source=str(file_path))
 
-        is_first_line = True
-        for line in string.splitlines():
-            is_shebang_line = is_first_line and line.startswith("#!")
-            is_first_line   = False
+
+    @classmethod
+    def from_lines(cls,
+                   lines    : Iterable[str],
+                   /,*,
+                   category : str = "",
+                   version  : str = "",
+                   source   : str = "",
+                   ) -> "StyleGroup":
+        """
+        Creates a StyleGroup instance from any iterable of lines (a list, a file object, a generator, ...)
+
+        Problems found while parsing do not stop the process, they are stored
+        in the `diagnostics` attribute of the returned group.
+
+        Args:
+            lines    (Iterable): The lines containing style definitions, with or without the line ending.
+            category (str): The category of the style group. Defaults to an empty string.
+            version  (str): The version of the style group. Defaults to an empty string.
+            source   (str): Optional name of the origin of the lines (e.g. a file path) used in the diagnostics.
+        """
+        style_group  = StyleGroup(category=category, version=version)
+        diagnostics  = style_group.diagnostics
+        lines_by_lowername = {}
+
+        def add_pending_style(action: str, action_line_number: int, body: list[str]):
+            if not action or not action.startswith(">>>"):
+                return
+            style_name = action[3:].strip()
+            template   = "\n".join(body).strip()
+            if not style_name:
+                diagnostics.append( StyleDiagnostic(source, action_line_number, "style definition without name, ignored") )
+                return
+            lowername = style_name.lower()
+            if lowername in lines_by_lowername:
+                diagnostics.append( StyleDiagnostic(source, action_line_number,
+                    f'duplicate style "{style_name}" (first defined at line {lines_by_lowername[lowername]}), the last definition is used') )
+            else:
+                lines_by_lowername[lowername] = action_line_number
+            if not template:
+                diagnostics.append( StyleDiagnostic(source, action_line_number, f'style "{style_name}" has an empty template') )
+            elif "{$@}" not in template:
+                diagnostics.append( StyleDiagnostic(source, action_line_number, f'style "{style_name}" does not contain "{{$@}}", the prompt will not be inserted') )
+            style_group.add_style(style_name, template)
+
+        action             = None
+        action_line_number = 0
+        body               = []
+        for line_number, line in enumerate(lines, start=1):
+            is_shebang_line = line_number == 1 and line.startswith("#!")
 
             line = line.rstrip() #< trailing whitespaces are lost at the end of each line
             if ( is_shebang_line        or #< sheban "#!ZCONFIG"        (compatibility with Amazing Z-Image Workflow)
@@ -92,27 +244,77 @@ class StyleGroup:
                  line.startswith(">>>")    #< style definition !!
                ):
                 # a new action is detected, so the previous pending one is processed
-                if action and action.startswith(">>>"):
-                    style_name = action[3:].strip()
-                    style_group.add_style(style_name, content.strip())
+                add_pending_style(action, action_line_number, body)
 
                 # the new action is stored as pending
-                action, content = line, ""
+                action, action_line_number, body = line, line_number, []
             else:
-                content += line + "\n"
+                body.append(line)
 
         # before ending, process any pending action
-        if action and action.startswith(">>>"):
-            style_name = action[3:].strip()
-            style_group.add_style(style_name, content.strip())
+        add_pending_style(action, action_line_number, body)
+        return style_group
+
+
+    @staticmethod
+    def scan_names(lines: Iterable[str]) -> list[str]:
+        """
+        Returns the names of the styles defined in the given lines without parsing their templates.
+
+        The result is the same as `from_lines(lines).get_names()` but much
+        cheaper, useful when only the list of styles is needed.
+        """
+        names      = []
+        lowernames = set()
+        for line in lines:
+            if not line.startswith(">>>"):
+                continue
+            name = line[3:].strip()
+            if name and name.lower() not in lowernames:
+                lowernames.add(name.lower())
+                names.append(name)
+        return names
 
+
+    @classmethod
+    def from_string_cached(cls,
+                           string : str,
+                           /,*,
+                           category : str = "",
+                           version  : str = "",
+                           ) -> "StyleGroup":
+        """
+        Same as `from_string()` but reusing the group parsed previously from identical content.
+
+        The returned group is frozen (read-only) because the same instance is
+        shared between all callers and threads; use `copy()` to get a
+        modifiable one.
+        """
+        string = string or ""
+        digest = hashlib.sha1( string.encode("utf-8", "surrogatepass") ).digest()
+        key    = (digest, category, version)
+        with _parsed_groups_lock:
+            style_group = _parsed_groups.get(key)
+            if style_group is not None:
+                _parsed_groups.move_to_end(key)
+                return style_group
+
+        style_group = cls.from_string(string, category=category, version=version).freeze()
+        for diagnostic in style_group.diagnostics:
+            logger.warning(f"Style customization, {diagnostic}")
+        with _parsed_groups_lock:
+            _parsed_groups[key] = style_group
+            while len(_parsed_groups) > _MAX_PARSED_GROUPS:
+                _parsed_groups.popitem(last=False)
         return style_group
 
+
     @staticmethod
     def apply_style_template(prompt        : str,
-                             style_template: str,
+                             style_template: str | StyleTemplate,
                              /,*,
-                             spicy_impact_booster: bool = False) -> str:
+                             spicy_impact_booster: bool = False,
+                             variables: dict[str, str] | None = None) -> str:
         """
         Applies a given style template to a prompt with optional spicy content boost.
 
@@ -121,19 +323,26 @@ class StyleGroup:
             style_template (str): The template style into which the prompt will be inserted.
                                   This is a string template that should contain "{$@}" and
                                   can be obtained with `style_group.get_style_template(name)`
+                                  (or already compiled with `style_group.get_compiled_template(name)`)
             spicy_impact_booster (optional): If True, adds spicy content to the output. Default is False.
+            variables            (optional): Values for additional "{$name}" placeholders in the template.
 
         Returns:
             The final styled prompt ready for use.
         """
+        if not isinstance(style_template, StyleTemplate):
+            style_template = StyleTemplate.compile(style_template)
+
         spicy_content = ""
         if spicy_impact_booster:
             spicy_content = "attractive and spicy content, where any woman is sexy and provocative, with"
 
-        result = style_template
-        result = result.replace("{$spicy-content-with}", spicy_content) #< the secret spicy dressing
-        result = result.replace("{$@}"                 , prompt       ) #< prompt to be styled
-        result = result.replace("  ", " ")                              #< fix double spaces
+        values = dict(variables) if variables else {}
+        values["spicy-content-with"] = spicy_content #< the secret spicy dressing
+        values["@"]                  = prompt        #< prompt to be styled
+
+        result = style_template.render(values)
+        result = result.replace("  ", " ")           #< fix double spaces
         return result
 
 
@@ -143,20 +352,52 @@ class StyleGroup:
         return name.lower() in self._templates_by_lowername
 
 
-    def get_style_template(self, name: str, default: str = "") -> str:
-        """Return the style template for a given name. If it doesn't exist, returns `default` or empty string."""
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        """Returns the name used to index a style (unquoted and in lowercase)."""
         name = name.strip()
         # the name can be quoted with single or double quotes
         if(  ( name.startswith("'") and name.endswith("'") )  or
              ( name.startswith('"') and name.endswith('"') )  ):
             name = name[1:-1]
-        lowername = name.lower()
-        return self._templates_by_lowername.get(lowername, default)
+        return name.lower()
+
+
+    def get_style_template(self, name: str, default: str = "") -> str:
+        """Return the style template for a given name. If it doesn't exist, returns `default` or empty string."""
+        return self._templates_by_lowername.get(self.normalize_name(name), default)
+
+
+    def get_compiled_template(self, name: str) -> StyleTemplate | None:
+        """Return the compiled style template for a given name. If it doesn't exist, returns None."""
+        return self._compiled_by_lowername.get(self.normalize_name(name))
+
+
+    def freeze(self) -> "StyleGroup":
+        """Make the group read-only, any later attempt to modify it raises TypeError. Returns the group itself."""
+        self._frozen = True
+        return self
+
+
+    @property
+    def is_frozen(self) -> bool:
+        """Whether the group is read-only."""
+        return self._frozen
+
+
+    def copy(self) -> "StyleGroup":
+        """Return a modifiable copy of the group."""
+        style_group = StyleGroup(category=self.category, version=self.version)
+        style_group.update(self)
+        return style_group
 
 
     def add_style(self, name: str, template: str):
         """Add a new style or update an existing one."""
+        self._check_not_frozen()
         lowername = name.lower()
+        # the template is compiled only once, when the style is added
+        self._compiled_by_lowername[lowername] = StyleTemplate.compile(template)
         # if the style already exists, then it is only updated
         if lowername in self._templates_by_lowername:
             self._templates_by_lowername[lowername] = template
@@ -169,11 +410,13 @@ class StyleGroup:
 
     def remove_style(self, name: str):
         """Remove a style by its name."""
+        self._check_not_frozen()
         lowername = name.lower()
         if lowername not in self._templates_by_lowername:
             return
         name = self._names_by_lowername[lowername] or name
         del self._templates_by_lowername[lowername]
+        del self._compiled_by_lowername[lowername]
         del self._names_by_lowername[lowername]
         self._ordered_names.remove(name)
 
@@ -230,3 +473,15 @@ class StyleGroup:
     def __str__(self) -> str:
         return f"StyleGroup({len(self._templates_by_lowername)} styles)"
 
+
+    def _check_not_frozen(self):
+        if self._frozen:
+            raise TypeError("This StyleGroup is frozen and cannot be modified, use `copy()` to get a modifiable one.")
+
+
+
+# LRU cache used by `StyleGroup.from_string_cached()`
+_MAX_PARSED_GROUPS  = 32
+_parsed_groups      = OrderedDict()
+_parsed_groups_lock = threading.Lock()
+
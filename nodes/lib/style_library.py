@@ -0,0 +1,146 @@
+"""
+File    : style_library.py
+Purpose : A directory of style definition files that is reloaded when its content changes.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 10, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+Each file in the directory is a style group in the same ">>>" format used by
+the "customization" input of the nodes, and its name (without extension) is
+used as the category of the styles it contains. For example:
+
+    styles/
+      my_photo_styles.txt    -> category "my_photo_styles"
+      comics.txt             -> category "comics"
+
+"""
+import os
+import time
+import threading
+from typing       import NamedTuple
+from .system      import logger
+from .profiling   import profile
+from .style_group import StyleGroup
+
+
+class _LoadedFile(NamedTuple):
+    mtime_ns   : int          #< modification time of the file when it was parsed
+    size       : int          #< size of the file when it was parsed
+    style_group: StyleGroup   #< the styles parsed from the file
+
+
+class StyleLibrary:
+    """
+    A directory of style files, loaded lazily and kept in sync with the disk.
+
+    The directory is not read until the first call to `refresh()`. Later calls
+    only look at the modification time and size of each file, so only new or
+    modified files are parsed again. Calls made within `min_interval` seconds
+    of the previous scan return immediately without touching the disk.
+
+    Args:
+        directory    (str): The directory containing the style files.
+        extensions (tuple): The file extensions to load. Defaults to (".txt", ".styles").
+        min_interval (float): Minimum number of seconds between two scans of the directory.
+        version      (str): The version assigned to all the loaded style groups.
+    """
+    def __init__(self,
+                 directory   : str,
+                 extensions  : tuple[str, ...] = (".txt", ".styles"),
+                 min_interval: float           = 2.0,
+                 version     : str             = "user",
+                 ):
+        self.directory     = directory
+        self.extensions    = tuple(ext.lower() for ext in extensions)
+        self.min_interval  = min_interval
+        self.version       = version
+        self._files        = {}     #< file path -> _LoadedFile
+        self._groups       = []
+        self._last_scan    = None
+        self._lock         = threading.Lock()
+
+
+    def refresh(self, *, force: bool = False) -> bool:
+        """
+        Synchronizes the loaded styles with the content of the directory.
+
+        Args:
+            force (optional): If True, the directory is scanned even if the last scan was recent.
+        Returns:
+            True if any style group was added, modified or removed since the previous call.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_scan is not None and (now - self._last_scan) < self.min_interval:
+                return False
+            self._last_scan = now
+
+            changed = False
+            files   = {}
+            for path, stat in self._scan():
+                loaded = self._files.get(path)
+                if loaded is None or loaded.mtime_ns != stat.st_mtime_ns or loaded.size != stat.st_size:
+                    loaded  = self._load(path, stat)
+                    changed = changed or loaded is not None
+                if loaded is not None:
+                    files[path] = loaded
+
+            # any file not found in this scan was removed from the directory
+            if len(files) != len(self._files) or files.keys() != self._files.keys():
+                changed = True
+
+            if changed:
+                self._files  = files
+                self._groups = [ files[path].style_group for path in sorted(files) ]
+                logger.debug(f"Style library '{self.directory}' reloaded: {len(self._groups)} files.")
+            return changed
+
+
+    def get_groups(self) -> list[StyleGroup]:
+        """Returns the style groups loaded in the last refresh, one for each file."""
+        return self._groups
+
+
+    def __str__(self) -> str:
+        return f"StyleLibrary('{self.directory}', {len(self._groups)} groups)"
+
+
+    #__ internal functions ________________________________
+
+    def _scan(self) -> list[tuple[str, os.stat_result]]:
+        """Returns the path and stat of each style file inside the directory."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as iterator:
+                for entry in iterator:
+                    if entry.name.startswith(".") or not entry.name.lower().endswith(self.extensions):
+                        continue
+                    try:
+                        if entry.is_file():
+                            entries.append( (entry.path, entry.stat()) )
+                    except OSError:
+                        pass
+        except FileNotFoundError:
+            pass
+        except OSError as error:
+            logger.warning(f"Unable to read the style library '{self.directory}': {error}")
+        return entries
+
+
+    def _load(self, path: str, stat: os.stat_result) -> _LoadedFile | None:
+        """Parses a style file, returns None if it cannot be read."""
+        category = os.path.splitext(os.path.basename(path))[0]
+        try:
+            with profile("style parse", path):
+                style_group = StyleGroup.from_file(path, category=category, version=self.version).freeze()
+        except (OSError, UnicodeDecodeError) as error:
+            logger.warning(f"Unable to load the style file '{path}': {error}")
+            return None
+        for diagnostic in style_group.diagnostics:
+            logger.warning(f"Style library, {diagnostic}")
+        return _LoadedFile(stat.st_mtime_ns, stat.st_size, style_group)
@@ -0,0 +1,222 @@
+"""
+File    : style_registry.py
+Purpose : A global index of styles from several style groups, for O(1) lookups.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 9, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import threading
+from typing       import Callable, Iterable, NamedTuple, Protocol
+from .style_group import StyleGroup, StyleTemplate
+
+
+class StyleEntry(NamedTuple):
+    """A style stored in the registry."""
+    name    : str            #< the style name as it was defined
+    category: str            #< the category of the group that contains the style
+    version : str            #< the version of the group that contains the style
+    template: StyleTemplate  #< the compiled template of the style
+
+
+class StyleGroupProvider(Protocol):
+    """Any object that supplies style groups that can change over time (e.g. a `StyleLibrary`)"""
+    def refresh(self) -> bool: ...
+    def get_groups(self) -> list[StyleGroup]: ...
+
+
+class StyleRegistry:
+    """
+    A single index of all styles contained in a list of style groups.
+
+    Names are normalized (unquoted and case-insensitive) when indexed, so
+    finding a style is a single dictionary lookup. When the same name is
+    present in more than one group, the first group wins. Every time the
+    groups are replaced `generation` is incremented, which allows anything
+    derived from the registry to know when it must be regenerated.
+
+    Besides the fixed groups, the registry can include the groups supplied by
+    providers; calling `refresh()` asks each provider for changes and the
+    index is rebuilt only when any of them reports one.
+
+    When a function is given instead of the groups, it is not called (and
+    the index is not built) until the registry is accessed for the first time.
+
+    Args:
+        style_groups (Iterable|Callable): The style groups to index, in order of priority,
+                                          or a function that returns them.
+    """
+    def __init__(self, style_groups: Iterable[StyleGroup] | Callable[[], Iterable[StyleGroup]] = ()):
+        self.generation      = 0
+        self._lock           = threading.RLock()
+        self._static_groups  = []
+        self._groups_loader  = None
+        self._providers      = []
+        self._groups         = []
+        self._index          = {}  #< normalized name -> StyleEntry
+        self._index_by_group = {}  #< category -> { normalized name -> StyleEntry }
+        self._names_cache    = {}  #< (category, quoted) -> list of names
+        self.set_groups(style_groups)
+
+
+    def set_groups(self, style_groups: Iterable[StyleGroup] | Callable[[], Iterable[StyleGroup]]):
+        """Replaces all the fixed style groups (the groups of the providers are kept)."""
+        with self._lock:
+            if callable(style_groups):
+                self._groups_loader = style_groups
+                return
+            self._groups_loader = None
+            self._static_groups = list(style_groups)
+            self._rebuild()
+
+
+    def add_provider(self, provider: StyleGroupProvider):
+        """
+        Adds an object that supplies more style groups, its groups have less priority than the existing ones.
+        The provider is not queried until the next call to `refresh()`.
+        """
+        with self._lock:
+            self._providers.append(provider)
+
+
+    def refresh(self) -> bool:
+        """
+        Asks every provider for changes and rebuilds the index if any of them has new groups.
+        Returns:
+            True if the index was rebuilt (and `generation` incremented).
+        """
+        with self._lock:
+            changed = self._load()
+            for provider in self._providers:
+                changed = provider.refresh() or changed
+            if changed:
+                self._rebuild()
+            return changed
+
+
+    def find(self, name: str, category: str | None = None) -> StyleEntry | None:
+        """
+        Returns the entry of a style, or None if it does not exist.
+        Args:
+            name     (str): The style name, it can be quoted and is case-insensitive.
+            category (optional): If provided, only the styles of this category are searched.
+        """
+        self._load()
+        key = StyleGroup.normalize_name(name)
+        if category is None:
+            return self._index.get(key)
+        group_index = self._index_by_group.get(category)
+        return group_index.get(key) if group_index else None
+
+
+    def get_compiled_template(self, name: str, category: str | None = None) -> StyleTemplate | None:
+        """Returns the compiled template of a style, or None if it does not exist."""
+        entry = self.find(name, category)
+        return entry.template if entry else None
+
+
+    def get_style_template(self, name: str, category: str | None = None, default: str = "") -> str:
+        """Returns the template text of a style. If it doesn't exist, returns `default` or empty string."""
+        entry = self.find(name, category)
+        return entry.template.text if entry else default
+
+
+    def get_groups(self) -> list[StyleGroup]:
+        """Returns all the indexed style groups."""
+        self._load()
+        return self._groups
+
+
+    def category_names(self) -> list[str]:
+        """Returns the names of all categories, in order."""
+        self._load()
+        return list( self._index_by_group.keys() )
+
+
+    def get_names(self, category: str | None = None, /,*, quoted: bool | str = False) -> list[str]:
+        """
+        Returns the names of all styles, optionally limited to a category.
+        Args:
+            category (optional): If provided, only the styles of this category are returned.
+            quoted   (optional): If True (or a quote char) each name is returned quoted.
+        """
+        cache_key = (category, quoted)
+        with self._lock:
+            self._load()
+            names = self._names_cache.get(cache_key)
+            if names is None:
+                names = []
+                for group in self._groups:
+                    if category is None or group.category == category:
+                        # names shadowed by a group with more priority are skipped
+                        names.extend( quoted_name for name, quoted_name
+                                      in zip(group.get_names(), group.get_names(quoted=quoted))
+                                      if self._is_indexed(name, group) )
+                self._names_cache[cache_key] = names
+            return names
+
+
+    def get_names_by_category(self, /,*, quoted: bool | str = False) -> dict[str, list[str]]:
+        """Returns a dictionary mapping each category to the names of its styles."""
+        return { category: self.get_names(category, quoted=quoted) for category in self.category_names() }
+
+
+    def __contains__(self, name: str) -> bool:
+        return self.find(name) is not None
+
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._index)
+
+
+    def __str__(self) -> str:
+        return f"StyleRegistry({len(self._groups)} groups, {len(self._index)} styles)"
+
+
+    #__ internal functions ________________________________
+
+    def _load(self) -> bool:
+        """Builds the index if the groups were given as a function and not loaded yet. Returns True if it was built."""
+        if self._groups_loader is None:
+            return False
+        with self._lock:
+            if self._groups_loader is None:
+                return False
+            style_groups, self._groups_loader = self._groups_loader, None
+            self._static_groups = list( style_groups() )
+            self._rebuild()
+            return True
+
+
+    def _is_indexed(self, name: str, group: StyleGroup) -> bool:
+        """Returns True if the style `name` of `group` is the one stored in the index."""
+        entry = self._index.get( StyleGroup.normalize_name(name) )
+        return entry is not None and entry.category == group.category and entry.template is group.get_compiled_template(name)
+
+
+    def _rebuild(self):
+        """Rebuilds the index from the fixed groups followed by the groups of each provider."""
+        groups          = list(self._static_groups)
+        index           = {}
+        index_by_group  = {}
+        for provider in self._providers:
+            groups.extend( provider.get_groups() )
+        for group in groups:
+            group_index = index_by_group.setdefault(group.category, {})
+            for name in group.get_names():
+                entry = StyleEntry(name, group.category, group.version, group.get_compiled_template(name))
+                key   = StyleGroup.normalize_name(name)
+                group_index.setdefault(key, entry)
+                index      .setdefault(key, entry)
+
+        with self._lock:
+            self._groups         = groups
+            self._index          = index
+            self._index_by_group = index_by_group
+            self._names_cache    = {}
+            self.generation     += 1
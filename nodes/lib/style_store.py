@@ -0,0 +1,179 @@
+"""
+File    : style_store.py
+Purpose : Store of all historical versions of the predefined styles, loaded on demand.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 11, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import time
+import hashlib
+import threading
+from typing       import Callable
+from .system      import logger
+from .profiling   import profile
+from .style_group import StyleGroup
+
+
+class VersionedStyleStore:
+    """
+    A store of style groups indexed by version, where each version is parsed only when requested.
+
+    The store does not keep the style definitions, they are requested from
+    the loader of the version when needed (loaders usually return the
+    definitions of an already imported module). The parsed template texts
+    are content-addressed: a text that is identical in several versions is
+    stored only once, so the parsed versions do not duplicate each other.
+
+    The names of the styles can be listed without parsing the version, so
+    nodes can fill their combo boxes at startup and leave the parsing for
+    the first time a template is actually needed.
+
+    Example:
+        >>> store = VersionedStyleStore()
+        >>> store.register_version("v1", lambda: {"photo": ">>>Phone Photo\\nA phone photo of {$@}\\n"})
+        >>> store.get_names("v1", "photo")
+        ['Phone Photo']
+        >>> store.get_style_template("Phone Photo", "v1")
+        'A phone photo of {$@}'
+    """
+    def __init__(self):
+        self._loaders            = {}  #< version -> function returning its sources
+        self._names_by_version   = {}  #< version -> { category -> [style names] }
+        self._groups_by_version  = {}  #< version -> list of frozen StyleGroup (only parsed versions)
+        self._texts_by_digest    = {}  #< digest -> template text
+        self._lock               = threading.RLock()
+
+
+    def register_version(self, version: str, loader: Callable[[], dict[str, str]]):
+        """
+        Registers a version of the styles without loading it.
+        Args:
+            version  (str): The version identifier (e.g. "v0.8.0")
+            loader   (Callable): Function that returns a dictionary mapping each category
+                                 to its style definitions (in the ">>>" format) in that version.
+        """
+        with self._lock:
+            self._loaders[version] = loader
+            self._names_by_version  .pop(version, None)
+            self._groups_by_version .pop(version, None)
+
+
+    def get_versions(self) -> list[str]:
+        """Returns all registered versions, in registration order."""
+        return list( self._loaders.keys() )
+
+
+    def is_loaded(self, version: str) -> bool:
+        """Returns True if the styles of the version are already parsed."""
+        return version in self._groups_by_version
+
+
+    def get_groups(self, version: str) -> list[StyleGroup]:
+        """
+        Returns the style groups of a version, parsing them if necessary.
+        Raises KeyError if the version is not registered.
+        """
+        groups = self._groups_by_version.get(version)
+        if groups is not None:
+            return groups
+        with self._lock:
+            groups = self._groups_by_version.get(version)
+            if groups is None:
+                start  = time.perf_counter()
+                groups = []
+                for category, source in self._get_sources(version).items():
+                    with profile("style parse", f"{version} {category}"):
+                        groups.append( self._intern_group(StyleGroup.from_string(source, category=category, version=version)) )
+                self._groups_by_version[version] = groups
+                self._names_by_version [version] = { group.category: group.get_names() for group in groups }
+                logger.debug(f"Styles {version} parsed in {(time.perf_counter()-start)*1000:.1f} ms, "
+                             f"{len(self._texts_by_digest)} distinct templates in the store.")
+            return groups
+
+
+    def get_group(self, version: str, category: str) -> StyleGroup | None:
+        """Returns the style group of a category in a given version, or None if it does not exist."""
+        return next((group for group in self.get_groups(version) if group.category == category), None)
+
+
+    def get_names(self, version: str, category: str) -> list[str]:
+        """
+        Returns the names of the styles of a category in a given version.
+        If the version was not parsed yet, the names are scanned from its definitions without parsing them.
+        """
+        return self._get_names_by_category(version).get(category, [])
+
+
+    def get_style_template(self, name: str, version: str, category: str | None = None, default: str = "") -> str:
+        """
+        Returns the template text that a style had in a given version.
+        Args:
+            name     (str): The style name, it can be quoted and is case-insensitive.
+            version  (str): The version where the style is searched.
+            category (optional): If provided, only the styles of this category are searched.
+            default  (optional): Value returned when the style does not exist. Defaults to "".
+        """
+        for group in self.get_groups(version):
+            if category is None or group.category == category:
+                template = group.get_style_template(name)
+                if template:
+                    return template
+        return default
+
+
+    def get_names_by_category_by_version(self, versions: list[str] | None = None) -> dict[str, dict[str, list[str]]]:
+        """
+        Returns, for each version, a dictionary mapping each category to the names of its styles.
+        Args:
+            versions (optional): The versions to include. Defaults to all registered versions.
+        """
+        names = {}
+        for version in (versions if versions is not None else self.get_versions()):
+            names[version] = dict( self._get_names_by_category(version) )
+        return names
+
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+
+    def __str__(self) -> str:
+        return f"VersionedStyleStore({len(self._loaders)} versions, {len(self._groups_by_version)} loaded, {len(self._texts_by_digest)} templates)"
+
+
+    #__ internal functions ________________________________
+
+    def _get_sources(self, version: str) -> dict[str, str]:
+        """Returns the style definitions of each category in a version. Raises KeyError if the version is not registered."""
+        return self._loaders[version]()
+
+
+    def _get_names_by_category(self, version: str) -> dict[str, list[str]]:
+        """Returns the style names of each category in a version, scanned once from its definitions."""
+        names = self._names_by_version.get(version)
+        if names is None:
+            with self._lock:
+                names = self._names_by_version.get(version)
+                if names is None:
+                    names = { category: StyleGroup.scan_names( source.splitlines() )
+                              for category, source in self._get_sources(version).items() }
+                    self._names_by_version[version] = names
+        return names
+
+
+    def _intern_group(self, group: StyleGroup) -> StyleGroup:
+        """Returns a frozen copy of `group` where each template text is the one shared by all versions."""
+        interned = StyleGroup(category=group.category, version=group.version)
+        for name in group.get_names():
+            interned.add_style(name, self._intern_text( group.get_style_template(name) ))
+        return interned.freeze()
+
+
+    def _intern_text(self, text: str) -> str:
+        digest = hashlib.sha1( text.encode("utf-8", "surrogatepass") ).digest()
+        return self._texts_by_digest.setdefault(digest, text)
@@ -19,16 +19,19 @@ Code for the metadata extraction process used by CivitAI:
 """
 import os
 import json
-import numpy as np
 import folder_paths
+import numpy as np
 from PIL                 import Image
-from PIL.PngImagePlugin  import PngInfo
 from comfy_api.latest    import io
 from typing              import Any
 from .lib.system         import logger
-from .lib.helpers        import expand_date_and_vars, normalize_images
+from .lib.image_writer   import get_image_writer
+from .lib.image_metadata import ImageMetadata, ImageMetadataCache, JPEG_MAX_EXIF_SIZE
+from .lib.helpers        import expand_date_and_vars, normalize_images, quantize_images
 from .lib.node_helpers   import get_input_int, get_input_float, get_input_string, \
-                                get_input_node, get_class_type, find_prompt
+                                get_class_type, get_prompt_graph
+
+METADATA_CACHE = ImageMetadataCache()
 
 
 class SaveImage(io.ComfyNode):
@@ -44,6 +47,10 @@ class SaveImage(io.ComfyNode):
     xEXTRA_PREFIX  = ""
     xOUTPUT_DIR    = ""
 
+    # when enabled, `execute()` returns as soon as the images are queued
+    # in the writer pool instead of waiting until they are written to disk
+    xBACKGROUND_SAVE = bool(os.getenv("ZIMAGE_NODES_BACKGROUND_SAVE"))
+
     #__ INPUT / OUTPUT ____________________________________
     @classmethod
     def define_schema(cls) -> io.Schema:
@@ -66,6 +73,18 @@ class SaveImage(io.ComfyNode):
                 io.Boolean.Input("civitai_compatible_metadata", default=True,
                                  tooltip="Whether to save the image in a CivitAI compatible format. If checked, this will modify the metadata de forma que el prompt y demas parametros puedan ser leidos por CivitAI.",
                                 ),
+                io.Combo.Input  ("metadata_compression", options=cls.metadata_compressions(), default="none", optional=True,
+                                 tooltip="How the prompt and workflow are stored in the image. 'zlib' stores them compressed, greatly reducing the file size when the workflow is big, but some external tools may not be able to read compressed metadata.",
+                                ),
+                io.Combo.Input  ("format", options=cls.format_names(), default="png", optional=True,
+                                 tooltip="The file format used to save the images. 'png (store only)' writes uncompressed PNG files, the fastest option for scratch output. Lossy formats store the metadata as EXIF.",
+                                ),
+                io.Int.Input    ("quality", default=90, min=1, max=100, optional=True,
+                                 tooltip="The quality of lossy formats (webp, jpeg, avif, jpeg xl). Higher values produce better images and bigger files.",
+                                ),
+                io.Int.Input    ("effort", default=cls.xCOMPRESS_LVL, min=0, max=9, optional=True,
+                                 tooltip="How much CPU time the encoder spends to reduce the file size (0 = fastest, 9 = smallest). For png it is the zlib compression level.",
+                                ),
             ],
             hidden=[
                 io.Hidden.prompt,
@@ -75,7 +94,15 @@ class SaveImage(io.ComfyNode):
 
     #__ FUNCTION __________________________________________
     @classmethod
-    def execute(cls, images, filename_prefix: str, civitai_compatible_metadata: bool):
+    def execute(cls,
+                images,
+                filename_prefix            : str,
+                civitai_compatible_metadata: bool,
+                metadata_compression       : str = "none",
+                format                     : str = "png",
+                quality                    : int = 90,
+                effort                     : int | None = None,
+                ):
 
         output_dir     = cls.xOUTPUT_DIR if cls.xOUTPUT_DIR else folder_paths.get_output_directory()
         images         = normalize_images(images)
@@ -84,7 +111,6 @@ class SaveImage(io.ComfyNode):
         extra_pnginfo  = cls.hidden.extra_pnginfo
 
         prompt_nodes   = cls.hidden.prompt
-        workflow_nodes = extra_pnginfo.get("workflow") if extra_pnginfo else None
 
         # expand `filename_prefix` variables entered by the user and get the full path
         filename_prefix = expand_date_and_vars( f"{filename_prefix}{cls.xEXTRA_PREFIX}", vars = {} )
@@ -95,6 +121,174 @@ class SaveImage(io.ComfyNode):
                                                image_height)
 
 
+        # get the metadata to embed into the images (ComfyUI metadata + CivitAI injection),
+        # it is built and serialized only once for each prompt execution being saved
+        metadata_sources = (prompt_nodes, extra_pnginfo)
+        metadata_options = (bool(civitai_compatible_metadata),)
+        metadata = METADATA_CACHE.get(metadata_sources, metadata_options)
+        if metadata is None:
+            metadata = cls.build_metadata(prompt_nodes, extra_pnginfo,
+                                          civitai_compatible_metadata = civitai_compatible_metadata)
+            metadata = METADATA_CACHE.put(metadata_sources, metadata_options, metadata)
+        # get the encoder arguments for the selected file format,
+        # the metadata (with the CivitAI injection) is embedded in every format
+        compress_metadata    = (metadata_compression == "zlib")
+        extension, save_args = cls.get_save_args(format, metadata,
+                                                 quality           = quality,
+                                                 effort            = effort if effort is not None else cls.xCOMPRESS_LVL,
+                                                 compress_metadata = compress_metadata)
+
+
+        # quantize the whole batch to 8-bit pixels at once,
+        # each frame is then a view into this single contiguous buffer
+        frames     = quantize_images(images).numpy()
+        if save_args["format"] == "JPEG" and frames.shape[-1] == 2:
+            # JPEG cannot store the alpha channel (LA -> L), `normalize_images()` already limits RGB to 3 channels
+            frames = np.ascontiguousarray( frames[..., :-1] )
+        image_mode = cls.IMAGE_MODES_BY_CHANNELS[ frames.shape[-1] ]
+        image_size = (frames.shape[2], frames.shape[1])
+
+        # iterate over each image in batch to queue it in the writer pool,
+        # the pool compresses and writes the images to disk in parallel
+        # (the counters are reserved so that other batches still being written are not overwritten)
+        writer          = get_image_writer()
+        counter         = writer.reserve_counters(full_output_folder, name, counter, len(frames))
+        pending_writes  = []
+        image_locations = []
+        for batch_number, frame in enumerate(frames):
+            batch_name = name.replace("%batch_num%", str(batch_number))
+
+            # wrap the frame buffer as a PIL Image
+            image = Image.frombuffer(image_mode, image_size, frame, "raw", image_mode, 0, 1)
+
+            # generate the full file path to save the image
+            filename  = f"{batch_name}_{counter+batch_number:05}_.{extension}"
+            file_path =  os.path.join(full_output_folder, filename)
+
+            pending_writes.append( writer.submit(image, file_path, **save_args) )
+            image_locations.append({"filename" : filename,
+                                    "subfolder": subfolder,
+                                    "type"     : cls.xTYPE
+                                    })
+
+        # unless background saving is enabled, wait until the whole batch is on disk
+        # (any error produced while writing is raised here)
+        if not cls.xBACKGROUND_SAVE:
+            for pending_write in pending_writes:
+                pending_write.result()
+
+        # report how many bytes of metadata are stored in each image
+        metadata_format = save_args["format"]
+        metadata_size   = {"bytes"             : metadata.get_size(metadata_format, compress=compress_metadata),
+                           "uncompressed_bytes": metadata.get_size(metadata_format, compress=False),
+                           "compression"       : metadata_compression if metadata_format == "PNG" else "none",
+                           }
+        logger.debug(f'"Save Image" stored {metadata_size["bytes"]} bytes of metadata per image ({metadata_size["compression"]} compression).')
+
+        return { "ui": { "images": image_locations, "metadata_size": [ metadata_size ] } }
+
+
+
+
+    #__ internal functions ________________________________
+
+    IMAGE_MODES_BY_CHANNELS = { 1: "L", 2: "LA", 3: "RGB" }
+
+    # name -> (file extension, PIL format)
+    FORMATS = {
+        "png"              : ("png" , "PNG" ),
+        "png (store only)" : ("png" , "PNG" ),
+        "webp"             : ("webp", "WEBP"),
+        "webp (lossless)"  : ("webp", "WEBP"),
+        "jpeg"             : ("jpg" , "JPEG"),
+        "avif"             : ("avif", "AVIF"),
+        "jpeg xl"          : ("jxl" , "JXL" ),
+    }
+
+    @classmethod
+    def metadata_compressions(cls) -> list[str]:
+        return ["none", "zlib"]
+
+
+    @classmethod
+    def format_names(cls) -> list[str]:
+        """Returns the names of the file formats supported by the installed Pillow."""
+        Image.init()
+        try:
+            import pillow_jxl # noqa: F401 (optional plugin that registers the "JXL" format)
+        except ImportError:
+            pass
+        return [ name for name, (_, pil_format) in cls.FORMATS.items() if pil_format in Image.SAVE ]
+
+
+    @classmethod
+    def get_save_args(cls,
+                      format  : str,
+                      metadata: ImageMetadata,
+                      /,*,
+                      quality : int,
+                      effort  : int,
+                      compress_metadata: bool = False,
+                      ) -> tuple[str, dict]:
+        """
+        Returns the file extension and the arguments for `PIL.Image.save()` to write an image.
+
+        Args:
+            format   (str): The name of the file format, one of `FORMATS` keys.
+            metadata (ImageMetadata): The metadata to embed into the image.
+            quality  (int): Quality for lossy formats [1 -> 100].
+            effort   (int): CPU effort spent reducing the file size [0 -> 9].
+            compress_metadata (optional): Whether to compress the metadata (only PNG).
+        Returns:
+            A tuple with the file extension and a dictionary with the arguments.
+        """
+        extension, pil_format = cls.FORMATS.get(format, cls.FORMATS["png"])
+        quality = min(max(int(quality), 1), 100)
+        effort  = min(max(int(effort ), 0),   9)
+
+        if pil_format == "PNG":
+            return extension, {"format"        : pil_format,
+                               "pnginfo"       : metadata.get_pnginfo(compress=compress_metadata),
+                               "compress_level": 0 if format == "png (store only)" else effort,
+                               }
+        save_args = {"format": pil_format, "exif": metadata.get_exif(), "quality": quality}
+        if pil_format == "JPEG":
+            # a JPEG file cannot store an EXIF block bigger than 64KB
+            save_args["exif"], dropped = metadata.get_limited_exif(JPEG_MAX_EXIF_SIZE)
+            if dropped:
+                logger.warning(f'"Save Image": the metadata is too big for a JPEG file, not storing: {", ".join(dropped)}')
+        if pil_format == "WEBP":
+            save_args["method"]   = round(effort * 6 / 9)  #< 0=fast .. 6=slowest
+            save_args["lossless"] = (format == "webp (lossless)")
+        elif pil_format == "JPEG":
+            save_args["optimize"] = (effort >= 5)
+        elif pil_format == "AVIF":
+            save_args["speed"]    = 10 - round(effort * 10 / 9)  #< 10=fast .. 0=slowest
+        elif pil_format == "JXL":
+            save_args["effort"]   = max(1, effort)               #< 1=fast .. 9=slowest
+        return extension, save_args
+
+
+
+    @classmethod
+    def build_metadata(cls,
+                       prompt_nodes : dict | None,
+                       extra_pnginfo: dict | None,
+                       /,*,
+                       civitai_compatible_metadata: bool,
+                       ) -> ImageMetadata:
+        """
+        Builds the metadata to embed into the saved images.
+
+        Args:
+            prompt_nodes  (dict): The "prompt" structure of the execution (hidden input).
+            extra_pnginfo (dict): The extra info of the execution, including the "workflow" (hidden input).
+            civitai_compatible_metadata: Whether to inject the generation parameters as nodes readable by CivitAI.
+        Returns:
+            An `ImageMetadata` object with all texts already serialized.
+        """
+        workflow_nodes = extra_pnginfo.get("workflow") if extra_pnginfo else None
+
         # attempt to inject CivitAI compatible metadata
         if civitai_compatible_metadata:
             params = {}
@@ -132,51 +326,21 @@ class SaveImage(io.ComfyNode):
                 logger.info(f'"Save Image" utilized parameters from {contrib_count} user-tagged nodes to inject CivitAI metadata.')
 
 
-
-        # create PNG info containing ComfyUI metadata (+CivitAI injection)
-        pnginfo = PngInfo()
+        # collect ComfyUI metadata (+CivitAI injection)
+        objects = {}
 
         if prompt_nodes:
-            prompt_json = json.dumps(prompt_nodes)
-            pnginfo.add_text("prompt", prompt_json)
+            objects["prompt"] = prompt_nodes
 
         if workflow_nodes:
-            workflow_json = json.dumps(workflow_nodes)
-            pnginfo.add_text("workflow", workflow_json)
+            objects["workflow"] = workflow_nodes
 
         if extra_pnginfo:
             for info_name, info_dict in extra_pnginfo.items():
                 if info_name not in ("parameters", "prompt", "workflow"):
-                    pnginfo.add_text(info_name, json.dumps(info_dict))
+                    objects[info_name] = info_dict
 
-
-        # iterate over each image in batch to save it
-        image_locations = []
-        for batch_number, image in enumerate(images):
-            batch_name = name.replace("%batch_num%", str(batch_number))
-
-            # convert to PIL Image
-            image = np.clip( image.numpy(force=True) * 255, 0, 255 ) # <- numpy
-            image = Image.fromarray( image.astype(np.uint8) )        # <- PIL
-
-            # generate the full file path to save the image
-            filename  = f"{batch_name}_{counter+batch_number:05}_.png"
-            file_path =  os.path.join(full_output_folder, filename)
-
-            image.save(file_path,
-                       pnginfo        = pnginfo,
-                       compress_level = cls.xCOMPRESS_LVL)
-            image_locations.append({"filename" : filename,
-                                    "subfolder": subfolder,
-                                    "type"     : cls.xTYPE
-                                    })
-
-        return { "ui": { "images": image_locations } }
-
-
-
-
-    #__ internal functions ________________________________
+        return ImageMetadata.from_objects(objects)
 
 
     CIVITAI_NODES="""{
@@ -405,19 +569,19 @@ class SaveImage(io.ComfyNode):
         """
         initial_sampler_node = {}
         params = {}
+        graph  = get_prompt_graph(nodes)
 
-        # iterates through all nodes and analyzes those related to sampling
-        for node in nodes.values():
-            class_type: str = node.get("class_type","") if isinstance(node, dict) else ""
-            if not class_type:
-                continue
+        # iterates through the nodes related to sampling (in prompt order)
+        for node_id in graph.get_ids_by_class_type("KSampler", "ZSamplerTurbo"):
+            node       = graph.get_node(node_id)
+            class_type = get_class_type(node)
 
             if class_type == "KSampler":
-                latent_node = get_input_node(node,"latent_image", nodes=nodes)
+                latent_node = graph.get_input_node(node_id, "latent_image")
                 if cls.is_empty_latent_node(latent_node):
                     initial_sampler_node = node
-                    params["positive"]     = find_prompt(node, type="positive", nodes=nodes)
-                    params["negative"]     = find_prompt(node, type="negative", nodes=nodes)
+                    params["positive"]     = graph.find_prompt(node_id, type="positive")
+                    params["negative"]     = graph.find_prompt(node_id, type="negative")
                     params["seed"]         = get_input_int   (node, "seed"        , default=-1  )
                     params["steps"]        = get_input_int   (node, "steps"       , default=-1  )
                     params["cfg"]          = get_input_float (node, "cfg"         , default=-1.0)
@@ -425,11 +589,11 @@ class SaveImage(io.ComfyNode):
                     params["scheduler"]    = get_input_string(node, "scheduler"   , default=""  )
                     break
 
-            if class_type.startswith("ZSamplerTurbo "):
-                latent_node = get_input_node(node,"latent_input", nodes=nodes)
+            if class_type == "ZSamplerTurbo":
+                latent_node = graph.get_input_node(node_id, "latent_input")
                 if cls.is_empty_latent_node(latent_node):
                     initial_sampler_node = node
-                    params["positive"]     = find_prompt(node, type="positive", nodes=nodes)
+                    params["positive"]     = graph.find_prompt(node_id, type="positive")
                     params["seed"]         = get_input_int(node, "seed" , default=-1)
                     params["steps"]        = get_input_int(node, "steps", default=-1)
                     params["cfg"]          = 1.0      # this node always uses cfg = 1.0
@@ -452,18 +616,12 @@ class SaveImage(io.ComfyNode):
     def find_user_params(cls, title_tag: str, nodes: dict) -> tuple[int, dict[str, Any]]:
         all_params = {}
         contrib_count = 0
+        graph = get_prompt_graph(nodes)
 
-        for node in nodes.values():
-            if not isinstance(node,dict):
-                continue
-
-            # verify that all components of a node are present
-            meta = node.get("_meta")
-
-            # verify that the node has a valid "title" and it is tagged
-            title  = meta.get("title") if isinstance(meta,dict) else None
-            if not isinstance(title,str)  or  (not title_tag in title):
-                continue
+        # iterates through the nodes that have a title tagged by the user
+        for node_id in graph.get_ids_by_title_tag(title_tag):
+            node  = graph.get_node(node_id)
+            title = node["_meta"]["title"]
 
             params = {}
 
@@ -14,14 +14,18 @@ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
  - https://docs.comfy.org/development/comfyui-server/comms_routes
 
 """
-from functools                  import cache
+import gzip
+import json
+import hashlib
+from typing                     import Any, Callable, NamedTuple
 from server                     import PromptServer
 from aiohttp                    import web
-from .styles.predefined_styles  import PREDEFINED_STYLE_GROUPS
+from comfy.cli_args             import args
+from .styles.predefined_styles  import PREDEFINED_STYLES, STYLE_VERSIONS
+from .lib.metrics               import METRICS
 routes = PromptServer.instance.routes
 
 
-@cache
 def _style_names_by_category(quoted: bool | str = False) -> dict[ str, list[str] ]:
     """
     Generates a dictionary mapping categories to all the style names in that category.
@@ -30,48 +34,156 @@ def _style_names_by_category(quoted: bool | str = False) -> dict[ str, list[str]
         A dictionary where each key is a category and its value is
         a list of style names belonging to that category.
     """
-    names_by_category = {}
-    for style_group in PREDEFINED_STYLE_GROUPS:
-        names = names_by_category.setdefault( style_group.category, [] )
-        names.extend( style_group.get_names(quoted=quoted) )
+    return PREDEFINED_STYLES.get_names_by_category(quoted=quoted)
 
-    return names_by_category
 
+def _style_names_by_category_by_version(versions: list[str] | None = None) -> dict:
+    """
+    Generates a dictionary mapping each version of the predefined styles to its style names by category.
 
-@cache
-def _style_names_by_category_by_version() -> dict:
+    Args:
+        versions (optional): The versions to include. Defaults to all versions.
+    Returns:
+        A dictionary where each key is a version and its value is a dictionary
+        mapping each category to the list of style names it had in that version.
     """
-    Not implemented yet.
+    return STYLE_VERSIONS.get_names_by_category_by_version(versions)
+
+
+#========================= PRE-SERIALIZED RESPONSES ========================#
+
+class _CachedJson(NamedTuple):
+    generation: int    #< generation of the style registry used to build the response
+    body      : bytes  #< the JSON encoded as UTF-8
+    gzip_body : bytes  #< the same JSON compressed with gzip
+    etag      : str    #< strong ETag derived from the content
+    gzip_etag : str    #< strong ETag of the gzip representation (each representation needs its own)
+
+
+_cached_json_by_key: dict[str, _CachedJson] = {}
+
+
+def _get_cached_json(key: str, generate: Callable[[], Any]) -> _CachedJson:
     """
-    return {}
+    Returns the serialized JSON of a route, generating it only when the style registry has changed.
+
+    Args:
+        key      (str): An identifier of the response (e.g. the route path).
+        generate (Callable): Function that returns the object to serialize.
+    """
+    PREDEFINED_STYLES.refresh() #< pick up any change in the user style library
+    generation = PREDEFINED_STYLES.generation
+    cached     = _cached_json_by_key.get(key)
+    if cached is None or cached.generation != generation:
+        body   = json.dumps( generate(), ensure_ascii=False, separators=(",", ":") ).encode("utf-8")
+        digest = hashlib.sha1(body).hexdigest()
+        cached = _CachedJson(generation, body, gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}"', f'"{digest}-gz"')
+        _cached_json_by_key[key] = cached
+    return cached
+
+
+def _json_response(request: web.Request, key: str, generate: Callable[[], Any]) -> web.Response:
+    """
+    Responds with a pre-serialized JSON, answering with "304 Not Modified" when the client already has it.
+    """
+    cached   = _get_cached_json(key, generate)
+
+    # when ComfyUI compresses the responses itself (--enable-compress-response-body)
+    # the plain body is sent, otherwise it would be compressed twice; the ETag is weak
+    # because the middleware can change the encoding without changing the ETag
+    if getattr(args, "enable_compress_response_body", False):
+        use_gzip = False
+        etag     = "W/" + cached.etag
+    else:
+        use_gzip = _accepts_gzip( request.headers.get("Accept-Encoding", "") )
+        etag     = cached.gzip_etag if use_gzip else cached.etag
+    headers  = { "ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding" }
+
+    # weak validators ("W/...") are accepted too because proxies may re-encode the body
+    if_none_match = request.headers.get("If-None-Match", "")
+    if if_none_match.strip() == "*" or etag.removeprefix("W/") in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return web.Response(status=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return web.Response(body=cached.gzip_body, content_type="application/json", charset="utf-8", headers=headers)
+    return web.Response(body=cached.body, content_type="application/json", charset="utf-8", headers=headers)
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Returns True if an "Accept-Encoding" header allows a gzip response.
+    Codings with "q=0" are rejected, and "*" applies only when gzip is not listed explicitly.
+    """
+    qvalues = {}
+    for item in accept_encoding.lower().split(","):
+        coding, *params = [ part.strip() for part in item.split(";") ]
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try   : qvalue = float(value)
+                except: qvalue = 0.0
+        qvalues[ "gzip" if coding == "x-gzip" else coding ] = qvalue
+    return qvalues.get("gzip", qvalues.get("*", 0.0)) > 0.0
+
 
 
 #============================== SERVER ROUTES ==============================#
 
 @routes.get("/zi_power/styles/by_category")
-async def get_styles_by_category(_):
+async def get_styles_by_category(request):
     """
     Handles GET requests to '/zi_power/styles/by_category'.
     This route returns style names grouped by their respective categories.
     """
-    return web.json_response( _style_names_by_category() )
+    return _json_response(request, "styles/by_category", _style_names_by_category)
 
 @routes.get("/zi_power/quoted_styles/by_category")
-async def get_quoted_styles_by_category(_):
+async def get_quoted_styles_by_category(request):
     """
     Handles GET requests to '/zi_power/quoted_styles/by_category'.
     This route returns quoted style names grouped by their respective categories.
     """
-    return web.json_response( _style_names_by_category(quoted=True) )
+    return _json_response(request, "quoted_styles/by_category", lambda: _style_names_by_category(quoted=True))
 
 
 
 @routes.get("/zi_power/styles/by_version")
-async def get_styles_by_version(_):
+async def get_styles_by_version(request):
     """
     Handles GET requests to '/zi_power/styles/by_version'.
     This route returns each historical version,
     where each one contains the styles names in that version grouped by category.
+    The optional query parameter `version` limits the response to a single version,
+    so only that version has to be loaded.
     """
-    return web.json_response( _style_names_by_category_by_version() )
+    version = request.query.get("version")
+    if version is None:
+        return _json_response(request, "styles/by_version", _style_names_by_category_by_version)
+    if version not in STYLE_VERSIONS.get_versions():
+        return web.json_response({"error": f"Unknown style version '{version}'"}, status=404)
+    return _json_response(request, f"styles/by_version/{version}", lambda: _style_names_by_category_by_version([version]))
+
+
 
+@routes.get("/zi_power/metrics")
+async def get_metrics(request):
+    """
+    Handles GET requests to '/zi_power/metrics'.
+    This route returns the statistics of all the measurements taken while the nodes run
+    (timings of each sampler stage, step latencies, ...).
+    """
+    return web.json_response( METRICS.to_dict(), headers={"Cache-Control": "no-store"} )
+
+@routes.delete("/zi_power/metrics")
+async def delete_metrics(request):
+    """
+    Handles DELETE requests to '/zi_power/metrics'.
+    This route clears all the statistics and returns the ones collected until then.
+    """
+    metrics = METRICS.to_dict()
+    METRICS.reset()
+    return web.json_response( metrics, headers={"Cache-Control": "no-store"} )
@@ -0,0 +1,127 @@
+"""
+File    : style_prompt_batch_encoder.py
+Purpose : Node to get a list of conditionings from every combination of prompts and styles.
+Author  : Martin Rizzo | <martinrizzo@gmail.com>
+Date    : Feb 7, 2026
+Repo    : https://github.com/martin-rizzo/ComfyUI-ZImagePowerNodes
+License : MIT
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                          ComfyUI-ZImagePowerNodes
+         ComfyUI nodes designed specifically for the "Z-Image" model.
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+ ComfyUI V3 Schema oficial documentation:
+ - https://docs.comfy.org/custom-nodes/v3_migration
+
+"""
+from comfy_api.latest           import io
+from .lib.system                import logger
+from .lib.style_group           import StyleGroup
+from .lib.conditioning_cache    import encode_prompt
+from .styles.predefined_styles  import PREDEFINED_STYLES
+
+
+class StylePromptBatchEncoder(io.ComfyNode):
+    xTITLE         = "Style & Prompt Batch Encoder"
+    xCATEGORY      = ""
+    xCOMFY_NODE_ID = ""
+    xDEPRECATED    = False
+
+    #__ INPUT / OUTPUT ____________________________________
+    @classmethod
+    def define_schema(cls) -> io.Schema:
+        return io.Schema(
+            display_name  = cls.xTITLE,
+            category      = cls.xCATEGORY,
+            node_id       = cls.xCOMFY_NODE_ID,
+            is_deprecated = cls.xDEPRECATED,
+            is_input_list = True,
+            description   = (
+                "Transforms a list of text prompts into a list of embeddings, one for each combination "
+                "of prompt and style. Identical styled prompts are encoded only once, so large prompt "
+                "x style grids can be generated with a single node."
+            ),
+            inputs=[
+                io.Clip.Input  ("clip",
+                                tooltip="The CLIP model used for encoding the text."
+                               ),
+                io.String.Input("customization", optional=True, multiline=True, force_input=True,
+                                tooltip=(
+                                  'An optional multi-line string to customize existing styles. '
+                                  'Each style definition must start with ">>>" followed by the style name, and then include '
+                                  'its description on the next lines. The description should incorporate "{$@}" where the '
+                                  'main text prompt will be inserted.'),
+                               ),
+                io.String.Input("styles", multiline=True, default="none",
+                                tooltip='The styles to apply, one style name per line. Use "none" to include the prompt without style.',
+                               ),
+                io.String.Input("texts", multiline=True, dynamic_prompts=True,
+                                tooltip="The prompts to encode, one prompt per line.",
+                               ),
+            ],
+            outputs=[
+                io.Conditioning.Output(is_output_list=True, tooltip="The encoded texts, one for each combination of prompt and style (prompt-major order)."),
+                io.String.Output      (is_output_list=True, tooltip="The prompts after applying each style, in the same order as the conditionings."),
+            ]
+        )
+
+    #__ FUNCTION __________________________________________
+    @classmethod
+    def execute(cls,
+                clip          : list,
+                styles        : list[str],
+                texts         : list[str],
+                customization : list[str] | None = None,
+                ) -> io.NodeOutput:
+        clip          = clip[0] if clip else None
+        custom_styles = StyleGroup.from_string_cached( "\n".join(customization or []) )
+        style_names   = cls.split_lines(styles) or ["none"]
+        prompts       = cls.split_lines(texts)
+
+        if clip is None:
+            raise RuntimeError("ERROR: clip input is invalid: None\n\nIf the clip is from a checkpoint loader node your checkpoint does not contain a valid clip or text encoder model.")
+
+        # find the template of each style only once
+        PREDEFINED_STYLES.refresh()
+        templates = []
+        for style_name in style_names:
+            template = None
+            if style_name != "none":
+                template = custom_styles.get_compiled_template(style_name)
+                if not template:
+                    template = PREDEFINED_STYLES.get_compiled_template(style_name)
+                if not template:
+                    logger.warning(f'"{cls.xTITLE}" could not find the style {style_name}, the prompt is used unstyled.')
+            templates.append(template)
+
+        # build all styled prompts (prompt-major order)
+        styled_prompts = []
+        for prompt in prompts:
+            for template in templates:
+                styled_prompts.append(
+                    StyleGroup.apply_style_template(prompt, template, spicy_impact_booster=False) if template else prompt
+                )
+
+        # encode each distinct styled prompt only once
+        conditioning_by_prompt = {}
+        for styled_prompt in styled_prompts:
+            if styled_prompt not in conditioning_by_prompt:
+                conditioning_by_prompt[styled_prompt] = encode_prompt(clip, styled_prompt)
+        logger.debug(f'"{cls.xTITLE}" encoded {len(conditioning_by_prompt)} distinct prompts for {len(styled_prompts)} outputs.')
+
+        conditionings = [ conditioning_by_prompt[styled_prompt] for styled_prompt in styled_prompts ]
+        return io.NodeOutput( conditionings, styled_prompts )
+
+
+
+    #__ internal functions ________________________________
+
+    @staticmethod
+    def split_lines(strings: list[str] | str | None) -> list[str]:
+        """Returns all the non-empty lines contained in a list of strings."""
+        if isinstance(strings, str):
+            strings = [strings]
+        lines = []
+        for string in (strings or []):
+            lines.extend( line.strip() for line in str(string).splitlines() if line.strip() )
+        return lines
@@ -14,11 +14,11 @@ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
  - https://docs.comfy.org/custom-nodes/v3_migration
 
 """
-from functools                  import cache
 from comfy_api.latest           import io
 from .lib.system                import logger
 from .lib.style_group           import StyleGroup
-from .styles.predefined_styles  import PREDEFINED_STYLE_GROUPS
+from .lib.conditioning_cache    import encode_prompt
+from .styles.predefined_styles  import PREDEFINED_STYLES
 
 
 class StylePromptEncoder(io.ComfyNode):
@@ -26,6 +26,7 @@ class StylePromptEncoder(io.ComfyNode):
     xCATEGORY      = ""
     xCOMFY_NODE_ID = ""
     xDEPRECATED    = False
+    _logged_generation = None  #< registry generation of the last logged style count
 
     #__ INPUT / OUTPUT ____________________________________
     @classmethod
@@ -79,14 +80,15 @@ class StylePromptEncoder(io.ComfyNode):
                 ) -> io.NodeOutput:
         template      = None
         prompt        = text
-        custom_styles = StyleGroup.from_string(customization)
+        custom_styles = StyleGroup.from_string_cached(customization)
+        PREDEFINED_STYLES.refresh()
 
         if isinstance(style, str) and style != "none":
             # first search inside the custom styles that the user has defined,
             # if not found, search inside the predefined styles
-            template = custom_styles.get_style_template(style)
+            template = custom_styles.get_compiled_template(style)
             if not template:
-                template = cls.get_predefined_style_template(style)
+                template = PREDEFINED_STYLES.get_compiled_template(style)
 
         # if a style template was found, apply it to the prompt
         if template:
@@ -94,8 +96,9 @@ class StylePromptEncoder(io.ComfyNode):
 
         if clip is None:
             raise RuntimeError("ERROR: clip input is invalid: None\n\nIf the clip is from a checkpoint loader node your checkpoint does not contain a valid clip or text encoder model.")
-        tokens = clip.tokenize(prompt)
-        return io.NodeOutput( clip.encode_from_tokens_scheduled(tokens), prompt )
+
+        # the same styled prompt is encoded only once, later runs reuse the cached conditioning
+        return io.NodeOutput( encode_prompt(clip, prompt), prompt )
 
     #__ VALIDATION ________________________________________
     @classmethod
@@ -108,43 +111,42 @@ class StylePromptEncoder(io.ComfyNode):
 
     #__ internal functions ________________________________
 
-    @staticmethod
-    @cache
-    def category_names() -> list[str]:
+    @classmethod
+    def category_names(cls) -> list[str]:
         """Returns all available category names."""
-        return [ group.category for group in PREDEFINED_STYLE_GROUPS ]
+        cls.refresh_styles()
+        return PREDEFINED_STYLES.category_names()
 
 
-    @staticmethod
-    @cache
-    def style_names() -> list[str]:
+    @classmethod
+    def style_names(cls) -> list[str]:
         """Returns all available style names."""
-        names = ["none"]
-        for style_group in PREDEFINED_STYLE_GROUPS:
-            names.extend( style_group.get_names(quoted=True) )
-        number_of_custom_styles=4
-        logger.info(f'"Style & Prompt Encoder" includes support for {len(names)-number_of_custom_styles-1} different styles.')
-        return names
+        cls.refresh_styles()
+        return ["none"] + PREDEFINED_STYLES.get_names(quoted=True)
 
 
-    @staticmethod
-    @cache
-    def default_category_name() -> str:
-        return PREDEFINED_STYLE_GROUPS[0].category
+    @classmethod
+    def default_category_name(cls) -> str:
+        return PREDEFINED_STYLES.category_names()[0]
 
 
-    @staticmethod
-    @cache
-    def default_style_name() -> str:
-        return PREDEFINED_STYLE_GROUPS[0].get_names(quoted=True)[0]
+    @classmethod
+    def default_style_name(cls) -> str:
+        return PREDEFINED_STYLES.get_names(quoted=True)[0]
+
+
+    @classmethod
+    def refresh_styles(cls):
+        """Reloads the styles of the user library if they changed on disk."""
+        PREDEFINED_STYLES.refresh()
+        if cls._logged_generation != PREDEFINED_STYLES.generation:
+            cls._logged_generation = PREDEFINED_STYLES.generation
+            number_of_styles       = len(PREDEFINED_STYLES) - len(PREDEFINED_STYLES.get_names("custom"))
+            logger.info(f'"Style & Prompt Encoder" includes support for {number_of_styles} different styles.')
 
 
     @staticmethod
     def get_predefined_style_template(style_name: str) -> str:
         """Returns a predefined style template by its name, searching inside all category groups."""
-        for style_group in PREDEFINED_STYLE_GROUPS:
-            style = style_group.get_style_template(style_name)
-            if style:
-                return style
-        return ""
+        return PREDEFINED_STYLES.get_style_template(style_name)
 
@@ -15,8 +15,8 @@ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
 
 """
 from comfy_api.latest           import io
-from .lib.style_group           import StyleGroup
-from .styles.predefined_styles  import PREDEFINED_STYLE_GROUPS
+from .lib.style_group           import StyleGroup, StyleTemplate
+from .styles.predefined_styles  import PREDEFINED_STYLES
 
 
 class StyleStringInjector(io.ComfyNode):
@@ -64,6 +64,7 @@ class StyleStringInjector(io.ComfyNode):
         prompt         = string
 
         if isinstance(style, str) and style != "none":
+            PREDEFINED_STYLES.refresh()
             style_to_apply = cls.get_predefined_style(style)
 
         # if the style was found, apply it to the prompt
@@ -87,34 +88,29 @@ class StyleStringInjector(io.ComfyNode):
     @classmethod
     def category_names(cls) -> list[str]:
         """Returns all available category names."""
-        return [ group.category for group in PREDEFINED_STYLE_GROUPS ]
+        PREDEFINED_STYLES.refresh()
+        return PREDEFINED_STYLES.category_names()
 
 
     @classmethod
     def style_names(cls) -> list[str]:
         """Returns all available style names."""
-        names = ["none"]
-        for style_group in PREDEFINED_STYLE_GROUPS:
-            names.extend( style_group.get_names(quoted=True) )
-        return names
+        PREDEFINED_STYLES.refresh()
+        return ["none"] + PREDEFINED_STYLES.get_names(quoted=True)
 
 
     @classmethod
     def default_category_name(cls) -> str:
-        return PREDEFINED_STYLE_GROUPS[0].category
+        return PREDEFINED_STYLES.category_names()[0]
 
 
     @classmethod
     def default_style_name(cls) -> str:
-        return PREDEFINED_STYLE_GROUPS[0].get_names(quoted=True)[0]
+        return PREDEFINED_STYLES.get_names(quoted=True)[0]
 
 
     @classmethod
-    def get_predefined_style(cls, style_name: str) -> str:
-        """Returns a predefined style content by its name, searching inside all category groups."""
-        for style_group in PREDEFINED_STYLE_GROUPS:
-            style = style_group.get_style_template(style_name)
-            if style:
-                return style
-        return ""
+    def get_predefined_style(cls, style_name: str) -> StyleTemplate | None:
+        """Returns a predefined style template by its name, searching inside all category groups."""
+        return PREDEFINED_STYLES.get_compiled_template(style_name)
 
@@ -11,4 +11,49 @@ License : MIT
          ComfyUI nodes designed specifically for the "Z-Image" model.
 _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
 """
-from .predefined_styles_v090 import PREDEFINED_STYLE_GROUPS
+import os
+from ..lib.style_registry    import StyleRegistry
+from ..lib.style_library     import StyleLibrary
+from ..lib.style_store       import VersionedStyleStore
+
+
+def _load_styles_v080() -> dict[str, str]:
+    from .predefined_styles_v080 import PREDEFINED_STYLE_SOURCES
+    return PREDEFINED_STYLE_SOURCES
+
+def _load_styles_v090() -> dict[str, str]:
+    from .predefined_styles_v090 import PREDEFINED_STYLE_SOURCES
+    return PREDEFINED_STYLE_SOURCES
+
+
+def _get_user_styles_dir() -> str | None:
+    """
+    Returns the directory of the user style library.
+
+    It can be configured with the `ZIMAGE_NODES_STYLES_DIR` environment
+    variable, by default it is "zimage_styles" inside the ComfyUI user directory.
+    """
+    styles_dir = os.getenv("ZIMAGE_NODES_STYLES_DIR")
+    if styles_dir:
+        return os.path.expanduser(styles_dir)
+    try:
+        import folder_paths
+        return os.path.join(folder_paths.get_user_directory(), "zimage_styles")
+    except (ImportError, AttributeError):
+        return None
+
+
+# all historical versions of the predefined styles,
+# each version is imported and parsed only the first time it is requested
+LATEST_STYLE_VERSION = "v0.9.0"
+STYLE_VERSIONS       = VersionedStyleStore()
+STYLE_VERSIONS.register_version("v0.8.0", _load_styles_v080)
+STYLE_VERSIONS.register_version("v0.9.0", _load_styles_v090)
+
+# single index of the latest predefined styles, used by the nodes and the server routes
+# (it's built on first access and the styles of the user library are appended to it on each `refresh()`)
+PREDEFINED_STYLES = StyleRegistry( lambda: STYLE_VERSIONS.get_groups(LATEST_STYLE_VERSION) )
+
+_user_styles_dir = _get_user_styles_dir()
+if _user_styles_dir:
+    PREDEFINED_STYLES.add_provider( StyleLibrary(_user_styles_dir) )
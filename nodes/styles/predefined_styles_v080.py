@@ -323,10 +323,22 @@ _CustomStyles = """
 """
 
 
-PREDEFINED_STYLE_GROUPS = [
-    StyleGroup.from_string( _PhotoStyles       , category="photo"       , version="v0.8.0" ),
-    StyleGroup.from_string( _IllustrationStyles, category="illustration", version="v0.8.0" ),
-    StyleGroup.from_string( _OtherStyles       , category="other"       , version="v0.8.0" ),
-    StyleGroup.from_string( _CustomStyles      , category="custom"      , version="v0.8.0" ),
-]
-
+# the raw definitions of each category, they are parsed only when needed
+PREDEFINED_STYLE_SOURCES = {
+    "photo"        : _PhotoStyles       ,
+    "illustration" : _IllustrationStyles,
+    "other"        : _OtherStyles       ,
+    "custom"       : _CustomStyles      ,
+}
+
+
+def __getattr__(name: str):
+    # `PREDEFINED_STYLE_GROUPS` is built on first access (PEP 562)
+    if name == "PREDEFINED_STYLE_GROUPS":
+        global PREDEFINED_STYLE_GROUPS
+        PREDEFINED_STYLE_GROUPS = [
+            StyleGroup.from_string( source, category=category, version="v0.8.0" )
+            for category, source in PREDEFINED_STYLE_SOURCES.items()
+        ]
+        return PREDEFINED_STYLE_GROUPS
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -15,14 +15,19 @@ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
 
 _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
 """
+import time
 import torch
 import comfy.utils
 import comfy.sample
 import comfy.samplers
-from typing             import Any
-from comfy_api.latest   import io
-from .lib.system        import logger
-from .lib.progress_bar  import ProgressPreview
+from typing                import Any
+from comfy_api.latest      import io
+from .lib.system           import logger
+from .lib.progress_bar     import ProgressPreview, get_preview_policy
+from .lib.metrics          import METRICS, StepTimer
+from .lib.sigma_schedules  import get_sigma_schedules
+from .lib.noise_providers  import NoiseProvider, ZeroNoise, SEEDED_NOISE, get_seeded_noise_provider, get_fixed_seed_noise_provider
+from .lib.fused_sampler    import FusedStage, FusedStagesSampler, is_fused_sampler_enabled
 
 
 class ZSamplerTurbo(io.ComfyNode):
@@ -57,12 +62,18 @@ class ZSamplerTurbo(io.ComfyNode):
                 io.Int.Input         ("seed", default=0, min=0, max=0xffffffffffffffff, control_after_generate=True,
                                       tooltip="The seed used for the random noise generator, ensuring the same result is produced with the same value.",
                                      ),
-                io.Int.Input         ("steps", default=9, min=4, max=9, step=1,
+                io.Int.Input         ("steps", default=9, min=cls.min_steps(), max=cls.max_steps(), step=1,
                                       tooltip="The number of iterations to be performed during the sampling process.",
                                      ),
                 io.Float.Input       ("denoise", default=1.0, min=0.98, max=1.00, step=0.01,
                                       tooltip="The amount of denoising applied, lower values will maintain the structure of the initial image allowing for image to image sampling.",
                                      ),
+                io.String.Input      ("seeds", optional=True, default="",
+                                      tooltip=(
+                                        'Optional list of seeds to generate in a single batch, separated by commas and '
+                                        'accepting ranges (e.g. "1, 5, 10-15"). When empty, only the "seed" value is used. '
+                                        'Each seed produces the same image as running the node with that single seed.'),
+                                     ),
             ],
             outputs=[
                 io.Latent.Output(display_name="latent_output", tooltip="The resulting denoised latent image, ready to be decoded by a VAE or passed to another sampler."),
@@ -78,41 +89,20 @@ class ZSamplerTurbo(io.ComfyNode):
                 seed        : int,
                 steps       : int,
                 denoise     : float,
+                seeds       : str = "",
                 ) -> io.NodeOutput:
 
         # for now only the "euler" sampler has been tested with this technique
         sampler  = comfy.samplers.sampler_object("euler")
 
-        # set the sigmas for each number of steps
-        if steps>=9:
-            sigmas1  = [0.991, 0.98, 0.92]
-            sigmas2  = [0.935, 0.90, 0.875, 0.750, 0.0000]
-            sigmas3  = [0.6582, 0.4556, 0.2000, 0.0000]
-
-        elif steps==8:
-            sigmas1  = [0.991, 0.98, 0.92]
-            sigmas2  = [0.935, 0.90, 0.875, 0.750, 0.0000]
-            sigmas3  = [0.6582, 0.3019, 0.0000]
-
-        elif steps==7:
-            sigmas1  = [0.991, 0.98, 0.92]
-            sigmas2  = [0.9350, 0.8916, 0.7600, 0.0000]  # [0.9350, 0.8916, 0.7895, 0.0000],
-            sigmas3  = [0.6582, 0.3019, 0.0000]
-
-        elif steps==6:
-            sigmas1 = [0.991, 0.980, 0.920]
-            sigmas2 = [0.942, 0.780, 0.000]  # [0.935, 0.770, 0.000]
-            sigmas3 = [0.6582, 0.3019, 0.0000]
-
-        elif steps==5:
-            sigmas1 = [0.991, 0.980, 0.920]
-            sigmas2 = [0.942, 0.780, 0.000]
-            sigmas3 = [0.6200, 0.0000]
-
-        elif steps<=4:
-            sigmas1 = [0.991, 0.980, 0.920]
-            sigmas2 = [0.942, 0.000]
-            sigmas3 = [0.790, 0.000]
+        # get the sigmas of each stage for the requested number of steps
+        sigma_schedules = get_sigma_schedules()
+        sigmas1, sigmas2, sigmas3 = sigma_schedules.get_tensors( sigma_schedules.get_for_steps(steps) )
+
+        # when a list of seeds is provided, all of them are generated in a single batch
+        seed_list = cls.parse_seeds(seeds)
+        if seed_list:
+            seed = seed_list[0] if len(seed_list) == 1 else seed_list
 
         latent_output = cls.execute_3_steps_denoising(latent_input,
                                                         model    = model,
@@ -131,11 +121,50 @@ class ZSamplerTurbo(io.ComfyNode):
 
     #__ internal functions ________________________________
 
+    MAX_SEEDS = 256  #< maximum number of seeds generated in a single batch
+
+    @staticmethod
+    def min_steps() -> int:
+        """Returns the lowest number of steps that has a sigma schedule."""
+        return get_sigma_schedules().min_steps
+
+    @staticmethod
+    def max_steps() -> int:
+        """Returns the highest number of steps that has a sigma schedule."""
+        return get_sigma_schedules().max_steps
+
+
+    @classmethod
+    def parse_seeds(cls, seeds: str | None) -> list[int]:
+        """
+        Parses a list of seeds separated by commas (or spaces) that can include ranges like "10-15".
+        Args:
+            seeds (str): The text to parse.
+        Returns:
+            The list of seeds in the same order they were written, or an empty list if the text is empty.
+        """
+        seed_list = []
+        for item in (seeds or "").replace(",", " ").split():
+            first, separator, last = item.partition("-")
+            try:
+                first = int(first)
+                last  = int(last) if separator else first
+            except ValueError:
+                raise ValueError(f'ZSampler Turbo: invalid seed "{item}" in the list of seeds.')
+            if not (0 <= first <= 0xffffffffffffffff and 0 <= last <= 0xffffffffffffffff):
+                raise ValueError(f'ZSampler Turbo: seed "{item}" is out of range.')
+            step = 1 if last >= first else -1
+            if len(seed_list) + abs(last - first) + 1 > cls.MAX_SEEDS:
+                raise ValueError(f"ZSampler Turbo: a maximum of {cls.MAX_SEEDS} seeds can be generated in a single batch.")
+            seed_list.extend( range(first, last + step, step) )
+        return seed_list
+
+
     @classmethod
     def execute_3_steps_denoising(cls,
                                   latent_image,
                                   model    : Any,
-                                  seed     : int,
+                                  seed     : int | list[int],
                                   cfg      : float,
                                   positive : list,
                                   negative : list,
@@ -150,7 +179,9 @@ class ZSamplerTurbo(io.ComfyNode):
         Args:
             latent_image: A dictionary containing the data about the latent image to be processed.
             model       : The ComfyUI model object to be used during denoising.
-            seed        : Random seed for reproducibility.
+            seed        : Random seed for reproducibility. If a list of seeds is provided,
+                          the latent batch is repeated once per seed (seed-major order) and
+                          each repetition gets the same noise that a single-seed run would.
             cfg         : classifier-free guidance scale that controls the strength of negative prompts.
                           (a value of 1.0 means that the negative prompt has no effect on generation)
             positive    : Positive prompts or conditions for the model.
@@ -177,27 +208,89 @@ class ZSamplerTurbo(io.ComfyNode):
         prog1      = prog0 + sigmas1.shape[-1] - 1
         prog2      = prog1 + sigmas2.shape[-1] - 1
         prog_total = prog2 + sigmas3.shape[-1] - 1
-        progress = ProgressPreview.from_comfyui( model, prog_total )
+        policy   = get_preview_policy()
+        progress = ProgressPreview.from_comfyui( model, prog_total, policy=policy )
+        preview  = not policy.final_stage_only  #< whether the first two stages show the live preview
+
+        # with several seeds, the latent batch is repeated once per seed
+        # and the fixed seed of the third stage is used for every repetition
+        seeds       = seed if isinstance(seed, list) else [seed]
+        fixed_seeds = [696969] * len(seeds)
+        if len(seeds) > 1:
+            latent_image = cls.repeat_latent_batch(latent_image, len(seeds))
+        else:
+            seeds, fixed_seeds = seeds[0], fixed_seeds[0]
+
+        # the noise of the first stage depends on the seed, the third stage always uses
+        # the same seed so its noise is generated once and reused across stages and jobs
+        device              = getattr(model, "load_device", "cpu")
+        seeded_noise        = get_seeded_noise_provider(device)
+        fixed_seed_noise    = get_fixed_seed_noise_provider(device)
+
+        # all measurements are labeled with the number of steps to allow comparing configurations
+        start       = time.perf_counter()
+        samples     = latent_image["samples"]
+        batch_size  = samples.shape[0] if samples.ndim > 0 else 1
+        METRICS.observe("zsampler.latent_numel", samples.numel(), steps=prog_total)
+
+        # the fused sampler runs the three stages in a single sampling call,
+        # it does not support inpainting so masked latents use the three calls
+        if is_fused_sampler_enabled() and latent_image.get("noise_mask") is None:
+            with METRICS.timer("zsampler.fused_seconds", steps=prog_total):
+                latent_image = cls.execute_fused_sampler(model, seeds, fixed_seeds, cfg, positive, negative,
+                                                         sigmas            = (sigmas1, sigmas2, sigmas3),
+                                                         latent_image      = latent_image,
+                                                         noise_providers   = (seeded_noise, fixed_seed_noise),
+                                                         progress_previews = (
+                                                             StepTimer( ProgressPreview( prog1-prog0, parent=(progress,prog0,prog1), preview=preview ),
+                                                                        METRICS, "zsampler.step_seconds", steps=prog_total ),
+                                                             StepTimer( ProgressPreview( prog2-prog1, parent=(progress,prog1,prog2), preview=preview ),
+                                                                        METRICS, "zsampler.step_seconds", steps=prog_total ),
+                                                             StepTimer( ProgressPreview( prog_total-prog2, parent=(progress,prog2,prog_total) ),
+                                                                        METRICS, "zsampler.step_seconds", steps=prog_total ),
+                                                         ))
+            cls.observe_totals(start, batch_size, prog_total)
+            return latent_image
 
         # three steps denoising
-        latent_image = cls.execute_sampler_custom(model, True, seed, cfg, positive, negative, sampler,
-                                                  sigmas           = sigmas1,
-                                                  latent_image     = latent_image,
-                                                  progress_preview = ProgressPreview( prog1-prog0, parent=(progress,prog0,prog1) ),
-                                                  )
-        latent_image = cls.execute_sampler_custom(model, False, seed, cfg, positive, negative, sampler,
-                                                  sigmas           = sigmas2,
-                                                  latent_image     = latent_image,
-                                                  progress_preview = ProgressPreview( prog2-prog1 , parent=(progress,prog1,prog2) ),
-                                                  )
-        latent_image = cls.execute_sampler_custom(model, True, 696969, cfg, positive, negative, sampler,
-                                                  sigmas           = sigmas3,
-                                                  latent_image     = latent_image,
-                                                  progress_preview = ProgressPreview( prog_total-prog2, parent=(progress,prog2,prog_total) ),
-                                                  )
+        with METRICS.timer("zsampler.stage_seconds", stage=1, steps=prog_total):
+            latent_image = cls.execute_sampler_custom(model, True, seeds, cfg, positive, negative, sampler,
+                                                      sigmas           = sigmas1,
+                                                      latent_image     = latent_image,
+                                                      noise_provider   = seeded_noise,
+                                                      progress_preview = StepTimer( ProgressPreview( prog1-prog0, parent=(progress,prog0,prog1), preview=preview ),
+                                                                                    METRICS, "zsampler.step_seconds", steps=prog_total ),
+                                                      )
+        with METRICS.timer("zsampler.stage_seconds", stage=2, steps=prog_total):
+            latent_image = cls.execute_sampler_custom(model, False, seeds, cfg, positive, negative, sampler,
+                                                      sigmas           = sigmas2,
+                                                      latent_image     = latent_image,
+                                                      progress_preview = StepTimer( ProgressPreview( prog2-prog1 , parent=(progress,prog1,prog2), preview=preview ),
+                                                                                    METRICS, "zsampler.step_seconds", steps=prog_total ),
+                                                      )
+        with METRICS.timer("zsampler.stage_seconds", stage=3, steps=prog_total):
+            latent_image = cls.execute_sampler_custom(model, True, fixed_seeds, cfg, positive, negative, sampler,
+                                                      sigmas           = sigmas3,
+                                                      latent_image     = latent_image,
+                                                      noise_provider   = fixed_seed_noise,
+                                                      progress_preview = StepTimer( ProgressPreview( prog_total-prog2, parent=(progress,prog2,prog_total) ),
+                                                                                    METRICS, "zsampler.step_seconds", steps=prog_total ),
+                                                      )
+
+        cls.observe_totals(start, batch_size, prog_total)
         return latent_image
 
 
+    @staticmethod
+    def observe_totals(start: float, batch_size: int, steps: int):
+        """Records the end-to-end latency and throughput of a denoising that started at `start`."""
+        elapsed = time.perf_counter() - start
+        METRICS.observe("zsampler.total_seconds", elapsed, steps=steps)
+        if elapsed > 0:
+            METRICS.observe("zsampler.images_per_second", batch_size / elapsed, steps=steps)
+            METRICS.observe("zsampler.steps_per_second" , steps / elapsed     , steps=steps)
+
+
 
     @classmethod
     def execute_sampler_custom(cls,
@@ -212,6 +305,7 @@ class ZSamplerTurbo(io.ComfyNode):
                                latent_image : dict[str, Any],
                                *,
                                progress_preview: ProgressPreview | None = None,
+                               noise_provider  : NoiseProvider   | None = None,
                                ) -> dict[str, Any]:
         """
         Emulates the 'SamplerCustom' node from ComfyUI
@@ -219,7 +313,9 @@ class ZSamplerTurbo(io.ComfyNode):
         Args:
             model       : The ComfyUI model object to be used during denoising.
             add_noise   : Whether to add noise to the initial samples or not.
-            noise_seed  : The seed used to generate random noise.
+            noise_seed  : The seed used to generate random noise. If it's a list of seeds, the
+                          batch is divided in as many equal chunks and each chunk gets the noise
+                          generated from its seed as if it were sampled alone.
             cfg         : Classifier-free guidance scale that controls the strength of negative prompts.
                           A value of 1.0 means the negative prompt has no effect on generation.
             positive    : Positive prompts or conditions for the model.
@@ -228,6 +324,8 @@ class ZSamplerTurbo(io.ComfyNode):
             sigmas      : Sigma values used in the denoising process. Can be a list or torch.Tensor.
             latent_image: Dictionary containing the data about the initial latent image to denoise.
             progress_preview (ProgressPreview | None): Optional callback for tracking progress.
+            noise_provider   (NoiseProvider   | None): Optional provider of the noise when `add_noise` is True.
+                                                       Defaults to the same noise used by ComfyUI.
 
         Returns:
             A dictionary with the updated latent image data after denoising.
@@ -241,10 +339,11 @@ class ZSamplerTurbo(io.ComfyNode):
         samples     = comfy.sample.fix_empty_latent_channels(model, latent["samples"])
         noise_mask  = latent.get("noise_mask")
         batch_index = latent.get("batch_index")
-        if not add_noise:
-            noise = torch.zeros(samples.shape, dtype=samples.dtype, layout=samples.layout, device="cpu")
-        else:
-            noise = comfy.sample.prepare_noise(samples, noise_seed, batch_index)
+        noise       = cls.prepare_noise(model, add_noise, noise_seed, samples, batch_index, noise_provider=noise_provider)
+
+        # the sampler only uses the seed for its own noise (e.g. ancestral samplers)
+        if isinstance(noise_seed, list):
+            noise_seed = noise_seed[0]
 
         disable_pbar = not comfy.utils.PROGRESS_BAR_ENABLED
         samples = comfy.sample.sample_custom(model, noise, cfg, sampler, sigmas, positive, negative, samples, noise_mask=noise_mask, callback=progress_preview, disable_pbar=disable_pbar, seed=noise_seed)
@@ -252,3 +351,136 @@ class ZSamplerTurbo(io.ComfyNode):
         out = latent_image.copy()
         out["samples"] = samples
         return out
+
+
+    @classmethod
+    def execute_fused_sampler(cls,
+                              model,
+                              noise_seed,
+                              fixed_seed,
+                              cfg,
+                              positive,
+                              negative,
+                              sigmas           : tuple[torch.Tensor, torch.Tensor, torch.Tensor],
+                              latent_image     : dict[str, Any],
+                              *,
+                              noise_providers  : tuple[NoiseProvider, NoiseProvider],
+                              progress_previews: tuple[ProgressPreview | None, ...],
+                              ) -> dict[str, Any]:
+        """
+        Runs the three denoising stages with the Euler method in a single call to ComfyUI's sampler.
+
+        The model and the conditioning are prepared only once and, at each stage
+        boundary, the noise of the next stage is added exactly as the three
+        separate calls to `execute_sampler_custom()` would do.
+
+        Args:
+            model       : The ComfyUI model object to be used during denoising.
+            noise_seed  : The seed (or list of seeds) of the noise added in the first stage.
+            fixed_seed  : The seed (or list of seeds) of the noise added in the third stage.
+            cfg         : Classifier-free guidance scale.
+            positive    : Positive prompts or conditions for the model.
+            negative    : Negative prompts or conditions for the model.
+            sigmas      : The sigmas of each of the three stages.
+            latent_image: Dictionary containing the data about the initial latent image to denoise.
+            noise_providers  : The providers of the noise of the first and the third stage.
+            progress_previews: The progress callback of each stage.
+        Returns:
+            A dictionary with the updated latent image data after denoising.
+        """
+        latent      = latent_image.copy()
+        samples     = comfy.sample.fix_empty_latent_channels(model, latent["samples"])
+        batch_index = latent.get("batch_index")
+        noise1      = cls.prepare_noise(model, True, noise_seed, samples, batch_index, noise_provider=noise_providers[0])
+        noise3      = cls.prepare_noise(model, True, fixed_seed, samples, batch_index, noise_provider=noise_providers[1])
+
+        # callbacks that measure the steps (StepTimer) are restarted when their stage begins,
+        # otherwise the first step of each stage would include the time of the previous stages
+        sampler = FusedStagesSampler([
+            FusedStage(sigmas[0].shape[-1] - 1, None  , progress_previews[0], getattr(progress_previews[0], "restart", None)),
+            FusedStage(sigmas[1].shape[-1] - 1, None  , progress_previews[1], getattr(progress_previews[1], "restart", None)),
+            FusedStage(sigmas[2].shape[-1] - 1, noise3, progress_previews[2], getattr(progress_previews[2], "restart", None)),
+        ])
+        if isinstance(noise_seed, list):
+            noise_seed = noise_seed[0]
+
+        disable_pbar = not comfy.utils.PROGRESS_BAR_ENABLED
+        samples = comfy.sample.sample_custom(model, noise1, cfg, sampler, torch.cat(sigmas), positive, negative, samples, disable_pbar=disable_pbar, seed=noise_seed)
+
+        out = latent_image.copy()
+        out["samples"] = samples
+        return out
+
+
+    @classmethod
+    def prepare_noise(cls,
+                      model,
+                      add_noise  : bool,
+                      noise_seed : int | list[int],
+                      samples    : torch.Tensor,
+                      batch_index: list[int] | None,
+                      *,
+                      noise_provider: NoiseProvider | None = None,
+                      ) -> torch.Tensor:
+        """
+        Returns the noise for the latent samples, or a zero noise that takes no memory if `add_noise` is False.
+        """
+        with METRICS.timer("zsampler.noise_seconds", add_noise=bool(add_noise)):
+            if not add_noise:
+                # zero noise is a view without memory, created on the device where the sampler runs
+                return ZeroNoise( getattr(model, "load_device", "cpu") ).generate(samples, 0)
+            elif isinstance(noise_seed, list):
+                return cls.prepare_multi_seed_noise(samples, noise_seed, batch_index, noise_provider=noise_provider)
+            else:
+                return (noise_provider or SEEDED_NOISE).generate(samples, noise_seed, batch_index)
+
+
+    @staticmethod
+    def repeat_latent_batch(latent_image: dict[str, Any], times: int) -> dict[str, Any]:
+        """
+        Returns a copy of the latent with its batch repeated `times` times: [b0, b1, b0, b1, ...]
+        """
+        latent  = latent_image.copy()
+        samples = latent["samples"]
+        latent["samples"] = samples.repeat( (times,) + (1,) * (samples.ndim - 1) )
+        if latent.get("batch_index") is not None:
+            latent["batch_index"] = list(latent["batch_index"]) * times
+        return latent
+
+
+    @staticmethod
+    def prepare_multi_seed_noise(samples    : torch.Tensor,
+                                 seeds      : list[int],
+                                 batch_index: list[int] | None,
+                                 *,
+                                 noise_provider: NoiseProvider | None = None,
+                                 ) -> torch.Tensor:
+        """
+        Generates the noise for a batch made of one repetition of the original latent batch per seed.
+
+        Each chunk receives exactly the noise that the provider (by default
+        `comfy.sample.prepare_noise()`) generates for the original batch with that
+        seed, and repeated seeds reuse the noise already generated.
+
+        Args:
+            samples    : The repeated latent batch, its size must be a multiple of the number of seeds.
+            seeds      : The seed of each chunk, in order.
+            batch_index: The batch index of the original (not repeated) latent, if any.
+            noise_provider (optional): The provider used to generate the noise of each seed.
+        """
+        noise_provider = noise_provider or SEEDED_NOISE
+        chunk_size = samples.shape[0] // len(seeds)
+        if chunk_size * len(seeds) != samples.shape[0]:
+            raise ValueError("The latent batch size must be a multiple of the number of seeds.")
+        if batch_index is not None:
+            batch_index = batch_index[:chunk_size]
+
+        noise_by_seed = {}
+        chunks        = []
+        for number, seed in enumerate(seeds):
+            noise = noise_by_seed.get(seed)
+            if noise is None:
+                chunk = samples[number*chunk_size : (number+1)*chunk_size]
+                noise = noise_by_seed[seed] = noise_provider.generate(chunk, seed, batch_index)
+            chunks.append(noise)
+        return torch.cat(chunks, dim=0)